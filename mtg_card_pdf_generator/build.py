@@ -0,0 +1,324 @@
+import argparse
+import csv
+import os
+
+from tqdm import tqdm
+
+from checkpoint import BuildCheckpoint
+from deck_parser import parse_decklist
+from image_cache import IMAGE_FOLDER, fetch_card_images, is_cached
+from pdf_generator import CARD_HEIGHT_IN, CARD_WIDTH_IN, generate_pdf, pdf_page_sizes, slot_position
+from raster_export import RASTER_FORMATS, export_sheets
+from scryfall import image_size_for_dpi
+
+SEPARATOR_MODES = ("none", "marker", "card")
+DEFAULT_PDF = "mtg_cards_print.pdf"
+DEFAULT_SHEETS_FOLDER = "mtg_cards_sheets"
+
+class BuildError(Exception):
+    """A build that cannot produce a PDF; `status` is the short form for status lines."""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class BuildCancelled(Exception):
+    pass
+
+def _ignore(action, *args):
+    pass
+
+def _print_log(action, *args):
+    # Command line runs: progress is tqdm's, messages go to the console
+    if action == "log":
+        message, level = args[0]
+        tqdm.write(message if level == "INFO" else f"{level}: {message}")
+
+def _report_size(report, output_pdf, pages):
+    size = os.path.getsize(output_pdf)
+    report("log", (f"PDF size: {size / 1048576:.1f} MB over {pages} pages", "INFO"))
+    page_sizes = pdf_page_sizes(output_pdf)
+    if page_sizes is None:
+        report("log", (f"Average {size / max(pages, 1) / 1024:.0f} KB per page "
+                       "(install pikepdf for per-page sizes)", "INFO"))
+        return
+    for page, page_size in enumerate(page_sizes, start=1):
+        side = "front" if page % 2 else "back"
+        report("log", (f"Page {page} (sheet {(page + 1) // 2} {side}): {page_size / 1024:.0f} KB", "INFO"))
+
+def _image_size(image_size, dpi):
+    """A requested print DPI overrides the image size with the smallest one that meets it."""
+    if dpi:
+        return image_size_for_dpi(dpi, CARD_WIDTH_IN, CARD_HEIGHT_IN)
+    return image_size
+
+def resolve_deck(decklist_file, output_pdf, card_back, image_folder=IMAGE_FOLDER,
+                 image_size="normal", report=None, cancel_event=None, progress_span=(0, 50)):
+    """
+    Resolve and download every card of a decklist.
+    Returns ([(deck entry, front path, back path), ...], checkpoint) with the
+    custom card back filled in for single-faced cards; see build_pdf for `report`.
+    """
+    report = report or _ignore
+    progress_start, progress_end = progress_span
+
+    deck = parse_decklist(decklist_file)
+    if not deck:
+        raise BuildError("Decklist is empty.", "Decklist is empty.")
+
+    card_images = []
+    total_cards = len(deck)
+
+    # Resume from an interrupted run of the same decklist, if any
+    checkpoint = BuildCheckpoint.for_job(decklist_file, output_pdf, image_folder, image_size)
+    if checkpoint.resumed:
+        report("log", (f"Resuming previous build ({len(checkpoint.cards)} cards done)", "INFO"))
+
+    report("log", ("Starting card image downloads...", "INFO"))
+
+    with tqdm(total=total_cards, desc="Overall Progress", unit="card") as pbar:
+        for index, entry in enumerate(deck):
+            if cancel_event is not None and cancel_event.is_set():
+                checkpoint.save()
+                raise BuildCancelled(f"Cancelled after {index} of {total_cards} cards")
+
+            card_name, variant_info = entry.name, entry.variant_info
+            report("status", f"Processing '{card_name}' ({index+1}/{total_cards})...")
+            report("progress", progress_start + (index / total_cards) * (progress_end - progress_start))
+
+            try:
+                completed = checkpoint.completed(index)
+                if completed:
+                    front_path, back_path = completed
+                else:
+                    if is_cached(card_name, image_folder, image_size):
+                        report("log", (f"Using cached: {card_name}", "INFO"))
+                    front_path, back_path = fetch_card_images(
+                        card_name, variant_info, image_folder, image_size=image_size
+                    )
+                    checkpoint.record(index, front_path, back_path)
+                default_back = back_path or card_back
+                card_images.append((entry, front_path, default_back))
+                pbar.update(1)
+            except Exception as e:
+                error_msg = f"Error processing {card_name}: {e}"
+                report("log", (error_msg, "ERROR"))
+                continue
+
+    checkpoint.save()
+    report("log", ("Image processing complete!", "INFO"))
+    return card_images, checkpoint
+
+def build_pdf(decklist_file, output_pdf, card_back, image_folder=IMAGE_FOLDER,
+              image_size="normal", report=None, cancel_event=None, dpi=None, compact=False):
+    """
+    Resolve, download and lay out every card of a decklist into output_pdf.
+
+    `report(action, *args)` receives the same ("status", text), ("progress", percent)
+    and ("log", (message, level)) updates the GUI queue understands. Setting
+    `cancel_event` stops the build before the next card with BuildCancelled;
+    the checkpoint is kept so the job can resume later. Passing `dpi` picks
+    the smallest Scryfall image size that prints at that resolution, and
+    `compact` writes a deduplicated, linearized PDF (see generate_pdf).
+    """
+    report = report or _ignore
+    image_size = _image_size(image_size, dpi)
+    card_images, checkpoint = resolve_deck(decklist_file, output_pdf, card_back, image_folder,
+                                           image_size, report, cancel_event)
+
+    if not card_images:
+        raise BuildError("No images downloaded.",
+                         "No images were successfully downloaded. Check the console log.")
+
+    # Generate PDF with card-specific backs
+    report("status", "Generating PDF...")
+    report("progress", 75)
+
+    fronts = [front for _, front, _ in card_images]
+    backs = [back for _, _, back in card_images]
+    pages = generate_pdf(fronts, backs, output_pdf, compact=compact)
+    checkpoint.finish()
+    _report_size(report, output_pdf, pages)
+
+    report("status", "PDF generation complete!")
+    report("progress", 100)
+    report("log", ("PDF generation successful!", "INFO"))
+    return len(card_images)
+
+def build_sheets(decklist_file, output_dir, card_back, dpi=300, fmt="png", image_folder=IMAGE_FOLDER,
+                 report=None, cancel_event=None, workers=None):
+    """
+    Like build_pdf, but writes one PNG/TIFF per sheet side at exactly `dpi`,
+    rendered in parallel processes. Returns the written paths.
+    """
+    report = report or _ignore
+    image_size = _image_size("normal", dpi)
+    card_images, checkpoint = resolve_deck(decklist_file, output_dir, card_back, image_folder,
+                                           image_size, report, cancel_event)
+
+    if not card_images:
+        raise BuildError("No images downloaded.",
+                         "No images were successfully downloaded. Check the console log.")
+
+    fronts = [front for _, front, _ in card_images]
+    backs = [back for _, _, back in card_images]
+    prefix = os.path.splitext(os.path.basename(decklist_file))[0]
+    paths = _export_sheets(fronts, backs, {}, output_dir, dpi, fmt, prefix, workers, report, 50)
+    checkpoint.finish()
+    return paths
+
+def _export_sheets(fronts, backs, labels, output_dir, dpi, fmt, prefix, workers, report, progress_start):
+    report("status", "Rendering sheets...")
+
+    def progress(done, total, path):
+        report("progress", progress_start + done / total * (100 - progress_start))
+        report("log", (f"Wrote {os.path.basename(path)}", "INFO"))
+
+    paths = export_sheets(fronts, backs, output_dir, dpi, fmt, slot_labels=labels, workers=workers,
+                          prefix=prefix, progress=progress)
+    report("status", "Sheet export complete!")
+    report("progress", 100)
+    return paths
+
+def _consolidate(decklist_files, output, card_back, image_folder, image_size, separators,
+                 report, cancel_event):
+    """
+    Resolve several decklists into one run of slots.
+    Returns (fronts, backs, slot labels, placed cards, checkpoints).
+    """
+    if separators not in SEPARATOR_MODES:
+        raise ValueError(f"separators must be one of {', '.join(SEPARATOR_MODES)}")
+
+    fronts, backs, labels, placed = [], [], {}, []
+    checkpoints = []
+    for number, decklist_file in enumerate(decklist_files):
+        deck_name = os.path.splitext(os.path.basename(decklist_file))[0]
+        report("log", (f"Deck {number+1}/{len(decklist_files)}: {deck_name}", "INFO"))
+        span = (number / len(decklist_files) * 75, (number + 1) / len(decklist_files) * 75)
+        try:
+            card_images, checkpoint = resolve_deck(decklist_file, output, card_back, image_folder,
+                                                   image_size, report, cancel_event, span)
+        except BuildError as e:
+            report("log", (f"{deck_name}: {e}", "ERROR"))
+            continue
+        if not card_images:
+            continue
+        checkpoints.append(checkpoint)
+
+        if separators == "card":
+            labels[len(fronts)] = deck_name
+            fronts.append(None)
+            backs.append(None)
+        elif separators == "marker":
+            labels[len(fronts)] = deck_name
+        for entry, front, back in card_images:
+            placed.append((deck_name, entry.name, len(fronts)))
+            fronts.append(front)
+            backs.append(back)
+
+    if not placed:
+        raise BuildError("No images downloaded.",
+                         "No images were successfully downloaded. Check the console log.")
+    return fronts, backs, labels, placed, checkpoints
+
+def _write_manifest(manifest_file, placed):
+    with open(manifest_file, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["deck", "card", "sheet", "row", "column"])
+        for deck_name, card_name, index in placed:
+            writer.writerow([deck_name, card_name, *slot_position(index)])
+
+def build_consolidated_pdf(decklist_files, output_pdf, card_back, image_folder=IMAGE_FOLDER,
+                           image_size="normal", separators="marker", manifest_file=None,
+                           report=None, cancel_event=None, dpi=None, compact=False):
+    """
+    Lay out several decklists into one PDF, packing cards across deck boundaries
+    so only the final sheet can be partially filled.
+
+    separators: "none" packs decks back to back, "marker" labels each deck's first
+    slot with its name, "card" also spends one slot on a named separator card.
+    A CSV manifest of deck, card and sheet/row/column is written to manifest_file
+    (default: next to output_pdf). Returns the number of cards placed.
+    """
+    report = report or _ignore
+    image_size = _image_size(image_size, dpi)
+    fronts, backs, labels, placed, checkpoints = _consolidate(
+        decklist_files, output_pdf, card_back, image_folder, image_size, separators, report, cancel_event
+    )
+
+    report("status", "Generating PDF...")
+    report("progress", 75)
+    pages = generate_pdf(fronts, backs, output_pdf, slot_labels=labels, compact=compact)
+    _report_size(report, output_pdf, pages)
+
+    manifest_file = manifest_file or os.path.splitext(output_pdf)[0] + "_manifest.csv"
+    _write_manifest(manifest_file, placed)
+
+    for checkpoint in checkpoints:
+        checkpoint.finish()
+
+    report("status", "PDF generation complete!")
+    report("progress", 100)
+    report("log", (f"Placed {len(placed)} cards from {len(checkpoints)} decks; manifest: {manifest_file}", "INFO"))
+    return len(placed)
+
+def build_consolidated_sheets(decklist_files, output_dir, card_back, dpi=300, fmt="png",
+                              image_folder=IMAGE_FOLDER, separators="marker", manifest_file=None,
+                              report=None, cancel_event=None, workers=None):
+    """
+    build_consolidated_pdf for raster output: several decklists packed onto
+    shared sheets, written as one PNG/TIFF per sheet side into output_dir.
+    The manifest defaults to manifest.csv in output_dir. Returns the written paths.
+    """
+    report = report or _ignore
+    image_size = _image_size("normal", dpi)
+    fronts, backs, labels, placed, checkpoints = _consolidate(
+        decklist_files, output_dir, card_back, image_folder, image_size, separators, report, cancel_event
+    )
+    paths = _export_sheets(fronts, backs, labels, output_dir, dpi, fmt, "sheet", workers, report, 75)
+    manifest_file = manifest_file or os.path.join(output_dir, "manifest.csv")
+    _write_manifest(manifest_file, placed)
+
+    for checkpoint in checkpoints:
+        checkpoint.finish()
+    report("log", (f"Placed {len(placed)} cards from {len(checkpoints)} decks; manifest: {manifest_file}", "INFO"))
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a print PDF from one or more decklists.")
+    parser.add_argument("decklists", nargs="+")
+    parser.add_argument("-o", "--output",
+                        help=f"PDF file, or folder with --raster (default: {DEFAULT_PDF} / {DEFAULT_SHEETS_FOLDER})")
+    parser.add_argument("--back", default="assets/card_back.jpg", help="card back image")
+    parser.add_argument("--separators", choices=SEPARATOR_MODES, default="marker",
+                        help="how deck boundaries are shown when several decklists are given")
+    parser.add_argument("--manifest", help="CSV manifest path (default: next to the PDF, or in the sheets folder)")
+    parser.add_argument("--dpi", type=int, help="target print resolution; picks the Scryfall image size")
+    parser.add_argument("--raster", choices=sorted(RASTER_FORMATS),
+                        help="write per-sheet images into the --output folder instead of a PDF")
+    parser.add_argument("--compact", action="store_true",
+                        help="deduplicate images and linearize the PDF for faster upload and opening")
+    args = parser.parse_args()
+    args.output = args.output or (DEFAULT_SHEETS_FOLDER if args.raster else DEFAULT_PDF)
+
+    os.makedirs(IMAGE_FOLDER, exist_ok=True)
+    try:
+        if args.raster and len(args.decklists) == 1:
+            build_sheets(args.decklists[0], args.output, args.back, args.dpi or 300, args.raster,
+                         report=_print_log)
+        elif args.raster:
+            build_consolidated_sheets(args.decklists, args.output, args.back, args.dpi or 300, args.raster,
+                                      separators=args.separators, manifest_file=args.manifest,
+                                      report=_print_log)
+        elif len(args.decklists) == 1:
+            build_pdf(args.decklists[0], args.output, args.back, dpi=args.dpi, compact=args.compact,
+                      report=_print_log)
+        else:
+            build_consolidated_pdf(args.decklists, args.output, args.back,
+                                   separators=args.separators, manifest_file=args.manifest,
+                                   dpi=args.dpi, compact=args.compact, report=_print_log)
+    except BuildError as e:
+        parser.exit(1, f"{e}\n")
+    print(f"Saved {args.output}")
+
+if __name__ == "__main__":
+    main()
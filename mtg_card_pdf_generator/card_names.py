@@ -0,0 +1,173 @@
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+
+from http_session import session
+
+CATALOG_URL = "https://api.scryfall.com/catalog/card-names"
+CACHE_DIR = "mtgjson_cache"
+CACHE_FILE = os.path.join(CACHE_DIR, "card-names.json")
+CACHE_MAX_AGE = 7 * 24 * 60 * 60  # refresh the catalog weekly
+
+CONNECT_TIMEOUT = 5  # seconds
+READ_TIMEOUT = 30    # seconds, the catalog is a few MB
+RETRY_AFTER = 10 * 60  # seconds to wait before fetching again after a failed load
+
+# Minimum Dice similarity for a local match to be trusted over the network,
+# and how far it must lead the runner-up so near-ties are left to Scryfall.
+MIN_SCORE = 0.5
+MIN_MARGIN = 0.1
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9 ]+")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_name(name):
+    """Lowercase, strip accents and punctuation: "Lim-Dûl's Vault" -> "limduls vault"."""
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(c for c in name if not unicodedata.combining(c)).lower()
+    name = _NON_WORD_RE.sub("", name)
+    return _SPACES_RE.sub(" ", name).strip()
+
+
+def _trigrams(normalized):
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CardNameIndex:
+    """Trigram index over card names for typo-tolerant lookups without the network."""
+
+    def __init__(self, names):
+        self.names = []
+        self._exact = {}
+        self._sizes = []
+        self._postings = {}
+        for name in names:
+            self._add(name, name)
+            # Split, adventure and double-faced cards are often listed by front face only
+            if " // " in name:
+                for face in name.split(" // "):
+                    self._add(face, name)
+
+    def _add(self, key, name):
+        normalized = normalize_name(key)
+        if not normalized:
+            return
+        self._exact.setdefault(normalized, name)
+        grams = _trigrams(normalized)
+        entry = len(self.names)
+        self.names.append(name)
+        self._sizes.append(len(grams))
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(entry)
+
+    def __len__(self):
+        return len(self._exact)
+
+    def __contains__(self, name):
+        return normalize_name(name) in self._exact
+
+    def search(self, name, limit=5):
+        """Return up to `limit` (card name, score) pairs, best first."""
+        normalized = normalize_name(name)
+        if not normalized:
+            return []
+        exact = self._exact.get(normalized)
+        if exact is not None:
+            return [(exact, 1.0)]
+
+        grams = _trigrams(normalized)
+        hits = {}
+        for gram in grams:
+            for entry in self._postings.get(gram, ()):
+                hits[entry] = hits.get(entry, 0) + 1
+
+        best = {}
+        query_size = len(grams)
+        for entry, shared in hits.items():
+            score = 2.0 * shared / (query_size + self._sizes[entry])
+            card = self.names[entry]
+            if score > best.get(card, 0.0):
+                best[card] = score
+        ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit]
+
+    def best_match(self, name, min_score=MIN_SCORE, min_margin=MIN_MARGIN):
+        """
+        Return the closest known card name, or None if nothing is close enough
+        or the runner-up scores within `min_margin` of it.
+        """
+        results = self.search(name, limit=2)
+        if not results or results[0][1] < min_score:
+            return None
+        if len(results) > 1 and results[0][1] - results[1][1] < min_margin:
+            return None
+        return results[0][0]
+
+
+_index = None
+_index_lock = threading.Lock()
+_failed_at = None  # time.monotonic() of the last load that found no catalog
+
+
+def get_card_name_index(refresh=False):
+    """
+    Return the shared CardNameIndex, loading it from the on-disk catalog
+    and refreshing that from Scryfall when it is missing or stale.
+    Returns None if no catalog is available; after a failed load, that is
+    returned straight away for RETRY_AFTER seconds instead of fetching again.
+    """
+    global _index, _failed_at
+    with _index_lock:
+        if _index is not None and not refresh:
+            return _index
+        if _index is None and _failed_at is not None and time.monotonic() - _failed_at < RETRY_AFTER:
+            return None
+        names = _load_catalog(refresh)
+        if names:
+            _index = CardNameIndex(names)
+            _failed_at = None
+        elif _index is None:
+            _failed_at = time.monotonic()
+        return _index
+
+
+def _load_catalog(refresh=False):
+    cached = None
+    if os.path.exists(CACHE_FILE):
+        try:
+            with open(CACHE_FILE, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable card name cache: {e}")
+
+    if cached and not refresh and time.time() - os.path.getmtime(CACHE_FILE) < CACHE_MAX_AGE:
+        return cached
+
+    try:
+        response = session.get(
+            CATALOG_URL,
+            headers={"User-Agent": "MTGCardPDFGenerator/1.0"},
+            timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+        )
+        response.raise_for_status()
+        names = response.json()["data"]
+    except Exception as e:
+        print(f"Could not refresh card name catalog: {e}")
+        return cached
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(CACHE_FILE, "w", encoding="utf-8") as f:
+        json.dump(names, f)
+    return names
+
+
+if __name__ == "__main__":
+    index = get_card_name_index()
+    if index is not None:
+        print(index.search("Jace, the Mind Sculpter"))
+        print(index.search("Lightnig Bolt"))
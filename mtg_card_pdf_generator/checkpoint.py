@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+
+from image_cache import IMAGE_FOLDER, image_checksum
+
+JOBS_FOLDER = ".jobs"
+SAVE_EVERY = 10  # cards recorded between checkpoint writes
+
+def file_checksum(path):
+    """SHA-1 of a file's contents, or None if it cannot be read."""
+    digest = hashlib.sha1()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(65536), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+class BuildCheckpoint:
+    """
+    On-disk record of a build's progress: which deck entries are resolved and
+    downloaded, with checksums of their images. A build restarted with the same
+    decklist and output picks up where it stopped.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.cards = {}
+        self._unsaved = 0
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.cards = data.get("cards", {})
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable checkpoint {path}: {e}")
+
+    @classmethod
+    def for_job(cls, decklist_file, output_pdf, image_folder=IMAGE_FOLDER, image_size="normal"):
+        """Return the checkpoint for a decklist (keyed by its contents), output file and image size."""
+        key = f"{file_checksum(decklist_file)}:{os.path.abspath(output_pdf)}:{image_size}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        folder = os.path.join(image_folder, JOBS_FOLDER)
+        os.makedirs(folder, exist_ok=True)
+        return cls(os.path.join(folder, f"{digest}.json"))
+
+    @property
+    def resumed(self):
+        return bool(self.cards)
+
+    def completed(self, index):
+        """
+        Return (front_path, back_path or None) if entry `index` finished in an
+        earlier run and its images are unchanged on disk, else None.
+        """
+        card = self.cards.get(str(index))
+        if card is None:
+            return None
+        for path_key, sum_key in (("front", "front_sha1"), ("back", "back_sha1")):
+            path = card.get(path_key)
+            if path and image_checksum(path) != card.get(sum_key):
+                del self.cards[str(index)]
+                return None
+        return card["front"], card.get("back")
+
+    def record(self, index, front_path, back_path=None):
+        self.cards[str(index)] = {
+            "front": front_path,
+            "front_sha1": image_checksum(front_path),
+            "back": back_path,
+            "back_sha1": image_checksum(back_path) if back_path else None,
+        }
+        self._unsaved += 1
+        if self._unsaved >= SAVE_EVERY:
+            self.save()
+
+    def save(self):
+        # Write a temp file and rename so a crash never leaves a half-written checkpoint
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"cards": self.cards}, f)
+        os.replace(temp_path, self.path)
+        self._unsaved = 0
+
+    def finish(self):
+        """Remove the checkpoint once the job has fully completed."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -1,56 +1,267 @@
+import csv
 import re
 
-def parse_decklist(file_path):
-    """Parse decklist, preserving variant information and handling multipliers."""
+# Section headers used by Arena, MTGO, Moxfield and Archidekt text exports.
+SECTION_ALIASES = {
+    "deck": "mainboard",
+    "main": "mainboard",
+    "maindeck": "mainboard",
+    "mainboard": "mainboard",
+    "sideboard": "sideboard",
+    "side": "sideboard",
+    "sb": "sideboard",
+    "commander": "commander",
+    "commanders": "commander",
+    "companion": "companion",
+    "maybeboard": "maybeboard",
+    "maybe": "maybeboard",
+    "considering": "maybeboard",
+}
+
+# Sections that list candidates rather than cards in the deck; never printed.
+UNPRINTED_SECTIONS = {"maybeboard"}
+
+# One line of a text decklist, tokenized in a single match:
+#   "4 Lightning Bolt", "4x Lightning Bolt", "SB: 2 Duress",
+#   "1 Rapid Hybridization (SLD) 1126 [Instant] *F*"
+_CARD_LINE_RE = re.compile(r"""
+    ^(?:(?P<sb>SB:)\s*)?
+    (?P<count>\d+)\s*x?\s+
+    (?P<name>[^(\[*]*[^(\[*\s])
+    (?:\s*\((?P<set>[^)]*)\)(?:\s+(?P<number>[^\s\[\]*]+))?)?
+    (?:\s*\[[^\]]*\])*
+    (?:\s*\*(?P<finish>[A-Za-z]+)\*)?
+    \s*$
+""", re.IGNORECASE | re.VERBOSE)
+
+# "Sideboard", "Sideboard:", "// Sideboard", "Commander (1)"
+_SECTION_RE = re.compile(r"^(?://\s*)?(?P<section>[A-Za-z ]+?)\s*(?:\(\d+\))?\s*:?\s*$")
+
+# MTGO .dek export: <Cards CatID="..." Quantity="4" Sideboard="false" Name="Lightning Bolt" />
+_DEK_CARD_RE = re.compile(r"<Cards\b(?P<attrs>[^>]*)/?>", re.IGNORECASE)
+_DEK_ATTR_RE = re.compile(r'(\w+)="([^"]*)"')
+
+_SET_CODE_RE = re.compile(r"[^A-Za-z0-9]")
+
+# Column names used by Moxfield and Archidekt CSV exports, in order of preference.
+_CSV_COLUMNS = {
+    "count": ("count", "quantity", "qty"),
+    "name": ("name", "card name"),
+    "set": ("edition code", "set code", "edition", "set"),
+    "number": ("collector number", "collector #", "card number"),
+    "finish": ("foil", "finish"),
+    "section": ("board", "section", "categories", "category"),
+}
+
+
+class DeckEntry:
+    """A single decklist line: card name, copies and the printing it asks for."""
+
+    __slots__ = ("name", "count", "set_code", "collector_number", "foil", "section")
+
+    def __init__(self, name, count=1, set_code=None, collector_number=None,
+                 foil=False, section="mainboard"):
+        self.name = name
+        self.count = count
+        self.set_code = set_code
+        self.collector_number = collector_number
+        self.foil = foil
+        self.section = section
+
+    @property
+    def variant_info(self):
+        """Printing in the "(set) number" form used by older callers, or None."""
+        if not self.set_code:
+            return self.collector_number
+        if self.collector_number:
+            return f"({self.set_code}) {self.collector_number}"
+        return f"({self.set_code})"
+
+    def __repr__(self):
+        return (f"DeckEntry({self.name!r}, count={self.count}, set_code={self.set_code!r}, "
+                f"collector_number={self.collector_number!r}, foil={self.foil}, "
+                f"section={self.section!r})")
+
+
+def iter_decklist(source):
+    """
+    Stream DeckEntry objects from a decklist path or an open text file.
+    Plain text, Arena/MTGO text, MTGO .dek and Moxfield/Archidekt CSV are detected automatically.
+    """
+    if hasattr(source, "read"):
+        yield from _iter_lines(source)
+        return
+    with open(source, "r", encoding="utf-8-sig", newline="") as f:
+        yield from _iter_lines(f)
+
+
+def parse_decklist(source):
+    """
+    Parse decklist, preserving variant information and handling multipliers.
+    Maybeboard entries are left out; use iter_decklist to see every section.
+    """
     deck = []
-    with open(file_path, "r") as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-                
-            # Match different quantity formats: "4 Card", "4x Card", "4X Card"
-            quantity_match = re.match(r'^(\d+)\s*x?\s+(.+)$', line, re.IGNORECASE)
-            if not quantity_match:
-                continue
-                
-            count = int(quantity_match.group(1))
-            raw_name = quantity_match.group(2).strip()
-            
-            # Extract base name and variant info
-            base_name = clean_card_name(raw_name)
-            variant_info = extract_variant_info(raw_name)
-            
-            # Add the specified number of copies
-            deck.extend([(base_name, variant_info)] * count)
-    
+    for entry in iter_decklist(source):
+        if entry.section in UNPRINTED_SECTIONS:
+            continue
+        # Add the specified number of copies
+        deck.extend([entry] * entry.count)
     return deck
 
+
+def _iter_lines(lines):
+    lines = iter(lines)
+    section = "mainboard"
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if _looks_like_csv_header(line):
+            yield from _iter_csv(line, lines)
+            return
+        if line.startswith("<"):
+            yield from _iter_dek(line, lines)
+            return
+        entry, section = _parse_text_line(line, section)
+        if entry:
+            yield entry
+        yield from _iter_text(lines, section)
+        return
+
+
+def _iter_text(lines, section):
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        entry, section = _parse_text_line(line, section)
+        if entry:
+            yield entry
+
+
+def _parse_text_line(line, section):
+    """Return (entry or None, current section) for one stripped text line."""
+    match = _CARD_LINE_RE.match(line)
+    if match is None:
+        if line.startswith("#"):
+            return None, section
+        header = _SECTION_RE.match(line)
+        if header:
+            section = SECTION_ALIASES.get(header.group("section").strip().lower(), section)
+        return None, section
+
+    name, set_code, number = _split_printing(match)
+    entry = DeckEntry(
+        name,
+        int(match.group("count")),
+        set_code,
+        number,
+        match.group("finish") is not None,
+        "sideboard" if match.group("sb") else section,
+    )
+    return entry, section
+
+
+def _split_printing(match):
+    """Return (name, set code, collector number) from a matched card line."""
+    name = match.group("name")
+    set_code = match.group("set")
+    if set_code is None:
+        # "Lightning Bolt 123": a trailing bare number is a collector number
+        head, _, tail = name.rpartition(" ")
+        if head and tail.isdigit():
+            return head.rstrip(), None, tail
+        return name, None, None
+    set_code = _SET_CODE_RE.sub("", set_code).lower() or None
+    return name.rstrip(), set_code, match.group("number")
+
+
+def _iter_dek(first_line, lines):
+    for line in _chain(first_line, lines):
+        match = _DEK_CARD_RE.search(line)
+        if not match:
+            continue
+        attrs = dict(_DEK_ATTR_RE.findall(match.group("attrs")))
+        name = attrs.get("Name", "").strip()
+        if not name:
+            continue
+        try:
+            count = int(attrs.get("Quantity", 1))
+        except ValueError:
+            continue
+        section = "sideboard" if attrs.get("Sideboard", "").lower() == "true" else "mainboard"
+        yield DeckEntry(name, count, section=section)
+
+
+def _looks_like_csv_header(line):
+    if "," not in line:
+        return False
+    fields = {field.strip().strip('"').lower() for field in line.split(",")}
+    return (not fields.isdisjoint(_CSV_COLUMNS["name"])
+            and not fields.isdisjoint(_CSV_COLUMNS["count"]))
+
+
+def _iter_csv(header_line, lines):
+    reader = csv.reader(_chain(header_line, lines))
+    header = [column.strip().lower() for column in next(reader)]
+    index = {}
+    for key, candidates in _CSV_COLUMNS.items():
+        for candidate in candidates:
+            if candidate in header:
+                index[key] = header.index(candidate)
+                break
+
+    def column(row, key):
+        i = index.get(key)
+        if i is None or i >= len(row):
+            return ""
+        return row[i].strip()
+
+    for row in reader:
+        name = column(row, "name")
+        if not name:
+            continue
+        try:
+            count = int(column(row, "count") or 1)
+        except ValueError:
+            continue
+        set_code = _SET_CODE_RE.sub("", column(row, "set")).lower() or None
+        finish = column(row, "finish").lower()
+        section = column(row, "section").split(",")[0].strip().lower()
+        yield DeckEntry(
+            name,
+            count,
+            set_code,
+            column(row, "number") or None,
+            finish not in ("", "normal", "nonfoil", "false", "0"),
+            SECTION_ALIASES.get(section, "mainboard"),
+        )
+
+
+def _chain(first_line, lines):
+    yield first_line
+    yield from lines
+
+
 def clean_card_name(card_name):
     """
     Remove extraneous annotations from the card name.
     For example, "Rapid Hybridization (sld) 1126 [Instant]" becomes "Rapid Hybridization".
     """
-    # Remove parenthesized text.
-    cleaned = re.sub(r'\s*\(.*?\)', '', card_name)
-    # Remove square-bracketed text.
-    cleaned = re.sub(r'\s*\[.*?\]', '', cleaned)
-    # Remove trailing numbers.
-    cleaned = re.sub(r'\s*\d+$', '', cleaned)
-    return cleaned.strip()
+    match = _CARD_LINE_RE.match(f"1 {card_name.strip()}")
+    if match is None:
+        return card_name.strip()
+    return _split_printing(match)[0]
+
 
 def extract_variant_info(card_name):
     """Extract variant information from card name."""
-    variant = ""
-    # Match (set) and/or collector number
-    set_match = re.search(r'\((.*?)\)', card_name)
-    if set_match:
-        variant = set_match.group(0)
-    # Add collector number if present
-    num_match = re.search(r'\s+\d+$', card_name)
-    if num_match:
-        variant += num_match.group(0)
-    return variant.strip() if variant else None
+    match = _CARD_LINE_RE.match(f"1 {card_name.strip()}")
+    if match is None:
+        return None
+    name, set_code, number = _split_printing(match)
+    return DeckEntry(name, set_code=set_code, collector_number=number).variant_info
+
 
 if __name__ == "__main__":
     # Test the clean function:
@@ -0,0 +1,78 @@
+import os
+import time
+
+try:
+    import msvcrt  # Windows
+except ImportError:
+    msvcrt = None
+    import fcntl
+
+LOCK_TIMEOUT = 120  # seconds; long enough for the slowest image download
+POLL_INTERVAL = 0.05
+
+class FileLock:
+    """
+    Exclusive lock shared by every process and thread that opens the same lock
+    file: msvcrt.locking on Windows, fcntl.flock elsewhere. The OS releases it
+    when the holder exits, so a crashed process never leaves a stale lock.
+    Lock files are left in place; deleting them would race with new holders.
+    """
+    def __init__(self, path, timeout=LOCK_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._file = None
+
+    def acquire(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        f = open(self.path, "a+b")
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                if msvcrt:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                else:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    f.close()
+                    raise TimeoutError(f"Timed out waiting for {self.path}")
+                time.sleep(POLL_INTERVAL)
+        self._file = f
+        return self
+
+    def release(self):
+        f, self._file = self._file, None
+        if f is None:
+            return
+        try:
+            if msvcrt:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        finally:
+            f.close()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+def replace_file(src, dst, timeout=5):
+    """
+    os.replace(src, dst), retried while Windows refuses it because another
+    process has dst open for reading. Readers see either the old or the new
+    file, never a partial one.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(POLL_INTERVAL)
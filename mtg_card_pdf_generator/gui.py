@@ -6,13 +6,16 @@ from PIL import Image, ImageTk  # <--- Install Pillow for image display
 import threading
 import queue
 from functools import partial
-import re
 import time
-from tqdm import tqdm
 
 from deck_parser import parse_decklist
-from scryfall import get_card_image_url, download_image
-from pdf_generator import generate_pdf
+from image_cache import IMAGE_FOLDER, cached_card_images, open_image
+from build import BuildError, build_pdf
+import print_client
+
+# Print resolutions offered in the GUI; the default keeps Scryfall's "normal" images
+DPI_DEFAULT = "Default"
+DPI_CHOICES = (DPI_DEFAULT, "150", "300", "600")
 
 class MTGPDFGeneratorGUI(tk.Tk):
     def __init__(self):
@@ -49,6 +52,7 @@ class MTGPDFGeneratorGUI(tk.Tk):
         self.decklist_file = tk.StringVar()
         self.output_pdf = tk.StringVar(value="mtg_cards_print.pdf")
         self.card_back_file = tk.StringVar(value="assets/card_back.jpg")
+        self.print_dpi = tk.StringVar(value=DPI_DEFAULT)
         self.status_text = tk.StringVar(value="Idle")
         self.success_message = tk.StringVar(value="")
         self.error_log = []
@@ -57,7 +61,7 @@ class MTGPDFGeneratorGUI(tk.Tk):
         self.current_thread = None
 
         # Create card_images directory at startup
-        self.image_folder = os.path.abspath("card_images")
+        self.image_folder = IMAGE_FOLDER
         if not os.path.exists(self.image_folder):
             os.makedirs(self.image_folder)
 
@@ -83,6 +87,11 @@ class MTGPDFGeneratorGUI(tk.Tk):
         ttk.Entry(frame_back, textvariable=self.card_back_file, width=50, style="Rounded.TEntry").pack(side=tk.LEFT, padx=5)
         ttk.Button(frame_back, text="Browse", command=self.browse_back).pack(side=tk.LEFT)
 
+        # Target print resolution; picks the Scryfall image size
+        ttk.Label(main_frame, text="Print Resolution (DPI):").pack(pady=10)
+        ttk.Combobox(main_frame, textvariable=self.print_dpi, values=DPI_CHOICES,
+                     state="readonly", width=10).pack(pady=5)
+
         # Status and progress bar
         ttk.Label(main_frame, textvariable=self.status_text).pack(pady=10)
         self.progress_bar = ttk.Progressbar(main_frame, orient="horizontal", length=400, mode="determinate")
@@ -148,7 +157,7 @@ class MTGPDFGeneratorGUI(tk.Tk):
 
     def browse_file(self):
         filename = filedialog.askopenfilename(title="Select Decklist File",
-                                              filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+                                              filetypes=[("Decklists", "*.txt *.csv *.dek"), ("All files", "*.*")])
         if filename:
             self.decklist_file.set(filename)
 
@@ -321,26 +330,22 @@ class MTGPDFGeneratorGUI(tk.Tk):
         loading_label.pack(pady=20)
         preview_window.update()
         
-        for card_tuple in deck:
-            card_name, variant_info = card_tuple
-            safe_name = self.sanitize_filename(card_name)
-            
-            front_path = os.path.join(self.image_folder, f"{safe_name}_front.jpg")
-            back_path = os.path.join(self.image_folder, f"{safe_name}_back.jpg")
-            
-            if not os.path.exists(front_path):
+        for entry in deck:
+            card_name = entry.name
+            cached = cached_card_images(card_name, self.image_folder)
+            if not cached:
                 continue
-                
-            if not os.path.exists(back_path):
+            front_path, back_path = cached
+            if not back_path:
                 back_path = self.card_back_file.get()
             
             try:
                 # Preload and process images
-                img_front = Image.open(front_path)
+                img_front = Image.open(open_image(front_path))
                 img_front = img_front.resize((100, 140), Image.Resampling.LANCZOS)
                 tk_front = ImageTk.PhotoImage(img_front)
                 
-                img_back = Image.open(back_path)
+                img_back = Image.open(open_image(back_path))
                 img_back = img_back.resize((100, 140), Image.Resampling.LANCZOS)
                 tk_back = ImageTk.PhotoImage(img_back)
                 
@@ -443,88 +448,40 @@ class MTGPDFGeneratorGUI(tk.Tk):
         
         preview_window.protocol("WM_DELETE_WINDOW", on_closing)
 
-    def sanitize_filename(self, name):
-        """Sanitize card name for file system use."""
-        # Remove special characters and invalid filename chars
-        name = name.split(" // ")[0]  # Take only the front card name
-        # Remove any special characters and replace with underscore
-        name = re.sub(r'[\\/*?:"<>|]', '', name)
-        name = re.sub(r'[^a-zA-Z0-9\-_\s]', '', name)
-        return name.replace(" ", "_").strip("_")
+    def selected_dpi(self):
+        """The chosen print DPI, or None for the default image size."""
+        value = self.print_dpi.get()
+        return None if value == DPI_DEFAULT else int(value)
 
     def generate_pdf_workflow(self):
         """Worker thread for PDF generation."""
         try:
-            deck = parse_decklist(self.decklist_file.get())
-            if not deck:
-                self.queue_action("status", "Decklist is empty.")
-                self.queue_action("complete", False, "Decklist is empty.")
-                return
-
-            card_images = []
-            total_cards = len(deck)
-            
-            self.queue_action("log", ("Starting card image downloads...", "INFO"))
-            
-            with tqdm(total=total_cards, desc="Overall Progress", unit="card") as pbar:
-                for index, card_tuple in enumerate(deck):
-                    card_name, variant_info = card_tuple
-                    self.queue_action("status", f"Processing '{card_name}' ({index+1}/{total_cards})...")
-                    self.queue_action("progress", (index / total_cards) * 50)
-
-                    safe_name = self.sanitize_filename(card_name)
-                    front_path = os.path.join(self.image_folder, f"{safe_name}_front.jpg")
-                    back_path = os.path.join(self.image_folder, f"{safe_name}_back.jpg")
-
-                    try:
-                        if not os.path.exists(front_path):
-                            sides = get_card_image_url(card_name, variant_info, image_size="normal")
-                            download_image(sides.front_url, front_path)
-                            if sides.back_url:
-                                download_image(sides.back_url, back_path)
-                                default_back = back_path
-                            else:
-                                default_back = self.card_back_file.get()
-                        else:
-                            self.queue_action("log", (f"Using cached: {safe_name}", "INFO"))
-                            default_back = self.card_back_file.get()
-                            if os.path.exists(back_path):
-                                default_back = back_path
-                                
-                        card_images.append((front_path, default_back))
-                        pbar.update(1)
-                    except Exception as e:
-                        error_msg = f"Error processing {card_name}: {e}"
-                        self.queue_action("log", (error_msg, "ERROR"))
-                        continue
-
-            self.queue_action("log", ("Image processing complete!", "INFO"))
-
-            if not card_images:
-                self.queue_action("status", "No images downloaded.")
-                self.queue_action("complete", False, "No images were successfully downloaded. Check the console log.")
-                return
-
-            # Generate PDF with card-specific backs
-            self.queue_action("status", "Generating PDF...")
-            self.queue_action("progress", 75)
-
-            output_pdf_file = self.output_pdf.get()
-            fronts = [front for front, _ in card_images]
-            backs = [back for _, back in card_images]
-            generate_pdf(fronts, backs, output_pdf_file)
-
-            self.queue_action("status", "PDF generation complete!")
-            self.queue_action("progress", 100)
-            self.queue_action("log", ("PDF generation successful!", "INFO"))
-
-            self.queue_action("complete", True, "PDF Generated: Remember to Save!")
+            if print_client.is_running():
+                self._run_on_service()
+            else:
+                build_pdf(self.decklist_file.get(), self.output_pdf.get(), self.card_back_file.get(),
+                          self.image_folder, report=self.queue_action, dpi=self.selected_dpi())
+                self.queue_action("complete", True, "PDF Generated: Remember to Save!")
 
+        except BuildError as e:
+            self.queue_action("status", e.status)
+            self.queue_action("complete", False, str(e))
         except Exception as e:
             self.queue_action("status", "An error occurred.")
             self.queue_action("log", (str(e), "ERROR"))
             self.queue_action("complete", False, str(e))
 
+    def _run_on_service(self):
+        """Hand the build to the local print service and relay its progress."""
+        job = print_client.submit_job(self.decklist_file.get(), self.card_back_file.get(),
+                                      dpi=self.selected_dpi())
+        self.queue_action("log", (f"Submitted to print service as job {job['id']}", "INFO"))
+        for event in print_client.stream_events(job["id"]):
+            args = [tuple(arg) if isinstance(arg, list) else arg for arg in event["args"]]
+            if event["action"] == "complete" and args[0]:
+                print_client.download_pdf(job["id"], self.output_pdf.get())
+            self.queue_action(event["action"], *args)
+
 if __name__ == "__main__":
     app = MTGPDFGeneratorGUI()
     app.mainloop()
@@ -0,0 +1,17 @@
+import requests
+
+USER_AGENT = "MTGCardPDFGenerator/1.0"
+
+# Pool size for connections kept open to each host (api.scryfall.com, cards.scryfall.io)
+POOL_SIZE = 16
+
+def _make_session():
+    s = requests.Session()
+    s.headers["User-Agent"] = USER_AGENT
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+# One session per process so every lookup and download reuses pooled connections
+session = _make_session()
@@ -0,0 +1,221 @@
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+
+from PIL import Image
+
+from scryfall import IMAGE_SIZE_WIDTHS, get_card_image_url, download_image
+from file_lock import FileLock
+from packstore import PackStore
+
+IMAGE_FOLDER = os.path.abspath("card_images")
+
+# "files" keeps one JPEG per card face; "pack" appends them into pack files
+# under <image folder>/packs (see packstore.py)
+IMAGE_STORE = os.environ.get("MTG_IMAGE_STORE", "files")
+PACK_PREFIX = "pack:"
+
+# Per-card locks live in <image folder>/.locks, hashed onto a fixed number of
+# lock files so the folder does not grow with the cache
+LOCK_FOLDER = ".locks"
+
+# Enough of the start of a JPEG or PNG to find its dimensions
+HEADER_BYTES = 64 * 1024
+
+# JPEG and PNG files end with a fixed trailer; a truncated download does not
+_IMAGE_TRAILERS = (b"\xff\xd9", b"IEND\xaeB`\x82")
+
+_pack_stores = {}
+_pack_stores_lock = threading.Lock()
+
+def get_pack_store(image_folder=IMAGE_FOLDER):
+    """Return the shared PackStore for an image folder."""
+    folder = os.path.join(os.path.abspath(image_folder), "packs")
+    with _pack_stores_lock:
+        store = _pack_stores.get(folder)
+        if store is None:
+            store = _pack_stores[folder] = PackStore(folder)
+        return store
+
+def sanitize_filename(name):
+    """Sanitize card name for file system use."""
+    # Remove special characters and invalid filename chars
+    name = name.split(" // ")[0]  # Take only the front card name
+    # Remove any special characters and replace with underscore
+    name = re.sub(r'[\\/*?:"<>|]', '', name)
+    name = re.sub(r'[^a-zA-Z0-9\-_\s]', '', name)
+    return name.replace(" ", "_").strip("_")
+
+def card_image_paths(card_name, image_folder=IMAGE_FOLDER):
+    """
+    Return the (front, back) cache references for a card: file paths, or
+    "pack:<folder>|<name>" references when the pack store is enabled.
+    """
+    safe_name = sanitize_filename(card_name)
+    names = (f"{safe_name}_front.jpg", f"{safe_name}_back.jpg")
+    if IMAGE_STORE == "pack":
+        folder = os.path.abspath(image_folder)
+        return tuple(f"{PACK_PREFIX}{folder}|{name}" for name in names)
+    return tuple(os.path.join(image_folder, name) for name in names)
+
+def _split_pack_ref(ref):
+    folder, key = ref[len(PACK_PREFIX):].rsplit("|", 1)
+    return get_pack_store(folder), key
+
+def entry_lock(ref):
+    """Cross-process lock for one cache entry, shared by every process using the folder."""
+    if ref.startswith(PACK_PREFIX):
+        folder, key = ref[len(PACK_PREFIX):].rsplit("|", 1)
+    else:
+        folder, key = os.path.split(os.path.abspath(ref))
+    stripe = hashlib.sha1(key.encode("utf-8")).hexdigest()[:2]
+    return FileLock(os.path.join(folder, LOCK_FOLDER, f"{stripe}.lock"))
+
+def open_image(ref):
+    """Return something PIL and reportlab can read: the path itself, or a file-like object."""
+    if ref.startswith(PACK_PREFIX):
+        store, key = _split_pack_ref(ref)
+        return store.open(key)
+    return ref
+
+def image_checksum(ref):
+    """SHA-1 of a cached image (or any file), or None if it cannot be read."""
+    if ref.startswith(PACK_PREFIX):
+        store, key = _split_pack_ref(ref)
+        return store.checksum(key)
+    digest = hashlib.sha1()
+    try:
+        with open(ref, "rb") as f:
+            for chunk in iter(lambda: f.read(65536), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+def is_complete_image(path):
+    """Cheap truncation check that reads only the last few bytes of the file."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() < 8:
+                return False
+            f.seek(-8, os.SEEK_END)
+            tail = f.read()
+    except OSError:
+        return False
+    return tail.rstrip(b"\0").endswith(_IMAGE_TRAILERS)
+
+def _exists(ref):
+    if ref.startswith(PACK_PREFIX):
+        store, key = _split_pack_ref(ref)
+        return key in store
+    return os.path.exists(ref)
+
+def _valid_cached(ref):
+    """
+    Return True if a complete image is cached at ref. A truncated file (left
+    by an older version) counts as missing and is replaced by the next fetch,
+    under the entry lock, rather than deleted here under a concurrent reader.
+    """
+    if ref.startswith(PACK_PREFIX):
+        # Pack entries are checked before they are stored
+        return _exists(ref)
+    return os.path.exists(ref) and is_complete_image(ref)
+
+def _download(url, ref):
+    if not ref.startswith(PACK_PREFIX):
+        download_image(url, ref)
+        return
+    store, key = _split_pack_ref(ref)
+    fd, temp_path = tempfile.mkstemp(suffix=".jpg", dir=store.folder)
+    os.close(fd)
+    try:
+        download_image(url, temp_path)
+        if not is_complete_image(temp_path):
+            raise IOError(f"Downloaded image for {key} is truncated")
+        store.put_file(key, temp_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def _image_width(ref):
+    """Width of a cached image, parsed from its first HEADER_BYTES only."""
+    if ref.startswith(PACK_PREFIX):
+        store, key = _split_pack_ref(ref)
+        header = store.get(key, limit=HEADER_BYTES)
+    else:
+        with open(ref, "rb") as f:
+            header = f.read(HEADER_BYTES)
+    with Image.open(io.BytesIO(header)) as img:
+        return img.width
+
+def _meets_size(ref, image_size):
+    """True if a cached image is at least as wide as Scryfall's `image_size`."""
+    required = IMAGE_SIZE_WIDTHS.get(image_size)
+    if not required:
+        return True
+    try:
+        return _image_width(ref) >= required * 0.95
+    except Exception:
+        return False
+
+def is_cached(card_name, image_folder=IMAGE_FOLDER, image_size=None):
+    """True if the card's front is cached, at `image_size` or larger when given."""
+    front_path, _ = card_image_paths(card_name, image_folder)
+    return _valid_cached(front_path) and (image_size is None or _meets_size(front_path, image_size))
+
+def cached_card_images(card_name, image_folder=IMAGE_FOLDER):
+    """Return (front, back or None) if the card is cached, else None. Never downloads."""
+    front_path, back_path = card_image_paths(card_name, image_folder)
+    if not _valid_cached(front_path):
+        return None
+    return front_path, back_path if _valid_cached(back_path) else None
+
+def _cached_pair(front_path, back_path, image_size):
+    """(front, back or None) if the card is fully cached at `image_size` or larger, else None."""
+    had_back = _exists(back_path)
+    if not (_valid_cached(front_path) and _meets_size(front_path, image_size)):
+        return None
+    back_cached = _valid_cached(back_path) and _meets_size(back_path, image_size)
+    if back_cached or not had_back:
+        return front_path, back_path if back_cached else None
+    return None
+
+def fetch_card_images(card_name, variant_info=None, image_folder=IMAGE_FOLDER,
+                      image_size="normal", sides=None):
+    """
+    Return (front, back or None) cache references for a card, resolving and
+    downloading whatever is not cached yet. Pass `sides` to skip the resolver
+    when the image URLs are already known (e.g. from a search result).
+    Cached images smaller than `image_size` are upgraded in place; larger
+    ones are kept as they are.
+
+    Safe to call from several processes sharing one cache: downloads of a
+    card are serialized by its entry lock, and images appear under their
+    cached name only once complete.
+    """
+    front_path, back_path = card_image_paths(card_name, image_folder)
+    cached = _cached_pair(front_path, back_path, image_size)
+    if cached:
+        return cached
+
+    # Resolve before locking: the lock is striped, and resolving can take many
+    # slow requests that would hold up unrelated cards on the same stripe
+    if sides is None:
+        sides = get_card_image_url(card_name, variant_info, image_size=image_size)
+
+    with entry_lock(front_path):
+        # Another process may have fetched the card while we waited
+        cached = _cached_pair(front_path, back_path, image_size)
+        if cached:
+            return cached
+
+        if not (_valid_cached(front_path) and _meets_size(front_path, image_size)):
+            _download(sides.front_url, front_path)
+        if sides.back_url:
+            _download(sides.back_url, back_path)
+            return front_path, back_path
+        return front_path, None
@@ -1,24 +1,42 @@
-import requests
-from requests.exceptions import Timeout, RequestException
+from http_session import session
 import urllib.parse
 
 CONNECT_TIMEOUT = 5  # seconds
 READ_TIMEOUT = 10    # seconds
 
+def parse_variant_info(variant_info):
+    """Split "(sld) 1126" into ("sld", "1126"); either part may be None."""
+    if not variant_info:
+        return None, None
+    set_code = None
+    rest = variant_info
+    if '(' in variant_info and ')' in variant_info:
+        set_code = variant_info[variant_info.find('(')+1:variant_info.find(')')].lower()
+        # Remove any special characters from set code
+        set_code = ''.join(c for c in set_code if c.isalnum()) or None
+        rest = variant_info[variant_info.find(')')+1:]
+    collector_number = rest.strip().lstrip('#').split()[0] if rest.strip() else None
+    return set_code, collector_number
+
+def _same_card(card, card_name):
+    """True if a Scryfall card object is the named card (either face of a multi-faced card)."""
+    wanted = card_name.lower()
+    names = [card.get('name', '')] + card.get('name', '').split(' // ')
+    return any(name.lower() == wanted for name in names)
+
 class MTGJSONDatabase:
     def find_variant(self, card_name, variant_info=None):
-        """Find specific variant of a card using Scryfall API directly."""
+        """
+        Find specific variant of a card using Scryfall API directly.
+        With a collector number this is a single cards/{set}/{number} request;
+        otherwise one name+set search. The returned dict carries the full
+        Scryfall card object under 'card', so callers need no second request.
+        """
         if not variant_info:
             return None
 
         try:
-            # Clean up the variant info
-            set_code = None
-            if '(' in variant_info and ')' in variant_info:
-                set_code = variant_info[variant_info.find('(')+1:variant_info.find(')')].lower()
-                # Remove any special characters from set code
-                set_code = ''.join(c for c in set_code if c.isalnum())
-
+            set_code, collector_number = parse_variant_info(variant_info)
             if not set_code:
                 return None
 
@@ -27,29 +45,23 @@ class MTGJSONDatabase:
             clean_name = clean_name.split('*')[0].strip()  # Remove *F* or similar markers
             clean_name = clean_name.split('#')[0].strip()  # Remove collector numbers
 
-            # Create the search query
-            query = f'!"{clean_name}" set:{set_code}'
-            url = "https://api.scryfall.com/cards/search"
-            params = {
-                'q': query,
-                'unique': 'prints'
-            }
-            
-            response = requests.get(
-                url,
-                params=params,
-                headers={"User-Agent": "MTGCardPDFGenerator/1.0"},
-                timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            if data.get('data') and len(data['data']) > 0:
-                card = data['data'][0]
+            card = None
+            if collector_number:
+                card = self._get_printing(set_code, collector_number)
+                if card is not None and not _same_card(card, clean_name):
+                    print(f"{set_code.upper()} #{collector_number} is {card.get('name')}, "
+                          f"not {clean_name}; searching the set instead")
+                    card = None
+
+            if card is None:
+                card = self._search_printing(clean_name, set_code)
+
+            if card is not None:
                 return {
                     'set': card['set'],
                     'collector_number': card.get('collector_number', ''),
-                    'id': card.get('id')
+                    'id': card.get('id'),
+                    'card': card
                 }
 
         except Exception as e:
@@ -57,3 +69,42 @@ class MTGJSONDatabase:
             return None
 
         return None
+
+    def _get_printing(self, set_code, collector_number):
+        """Fetch one printing by set code and collector number, or None if it does not exist."""
+        url = (f"https://api.scryfall.com/cards/{urllib.parse.quote(set_code)}/"
+               f"{urllib.parse.quote(collector_number)}")
+        response = session.get(
+            url,
+            headers={"User-Agent": "MTGCardPDFGenerator/1.0"},
+            timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+        )
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def _search_printing(self, clean_name, set_code):
+        """Return the first printing of a card in a set, or None."""
+        # Create the search query
+        query = f'!"{clean_name}" set:{set_code}'
+        url = "https://api.scryfall.com/cards/search"
+        params = {
+            'q': query,
+            'unique': 'prints'
+        }
+
+        response = session.get(
+            url,
+            params=params,
+            headers={"User-Agent": "MTGCardPDFGenerator/1.0"},
+            timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+        )
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        data = response.json()
+
+        if data.get('data') and len(data['data']) > 0:
+            return data['data'][0]
+        return None
@@ -0,0 +1,265 @@
+import argparse
+import hashlib
+import io
+import json
+import mmap
+import os
+import threading
+import time
+
+from file_lock import FileLock
+
+PACK_SIZE_LIMIT = 256 * 1024 * 1024  # start a new pack file past this size
+INDEX_FILE = "index.log"
+LOCK_FILE = "store.lock"
+REFRESH_INTERVAL = 2.0  # seconds a cache hit trusts the in-memory index
+
+class PackStore:
+    """
+    Image storage that appends blobs into a few large pack files instead of one
+    file per card face. An append-only index log (one JSON line per put or
+    delete) is replayed into memory on open, and reads are served from
+    memory-mapped packs. Deleted entries leave dead bytes until compact().
+
+    Several processes can share a store: writes hold a lock on store.lock,
+    and lookups replay index lines other processes have appended: always on
+    a miss, and at most every REFRESH_INTERVAL seconds on a hit.
+    """
+    def __init__(self, folder, pack_size_limit=PACK_SIZE_LIMIT):
+        self.folder = folder
+        self.pack_size_limit = pack_size_limit
+        self.index = {}  # key -> (pack number, offset, length, sha1)
+        self._maps = {}  # pack number -> (mmap, mapped length)
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(os.path.join(folder, LOCK_FILE))
+        os.makedirs(folder, exist_ok=True)
+        self._load_index()
+
+    def _pack_path(self, pack):
+        return os.path.join(self.folder, f"pack-{pack:04d}.dat")
+
+    def _index_path(self):
+        return os.path.join(self.folder, INDEX_FILE)
+
+    def _load_index(self):
+        self.index = {}
+        self.current_pack = 0
+        self._index_read = 0  # bytes of the index log replayed so far
+        self._index_id = None
+        self._checked = 0.0
+        self._refresh()
+
+    def _refresh(self):
+        """Replay index lines appended since the last read, by this or any other process."""
+        with self._lock:
+            self._checked = time.monotonic()
+            try:
+                st = os.stat(self._index_path())
+            except FileNotFoundError:
+                return
+            index_id = (st.st_dev, st.st_ino)
+            if self._index_id is not None and (index_id != self._index_id or st.st_size < self._index_read):
+                # Another process compacted the store: start over from the new index
+                self.close()
+                self._load_index()
+                return
+            self._index_id = index_id
+            if st.st_size == self._index_read:
+                return
+            with open(self._index_path(), "rb") as f:
+                f.seek(self._index_read)
+                data = f.read()
+            # A line still being appended by another process is left for next time
+            data = data[:data.rfind(b"\n") + 1]
+            self._index_read += len(data)
+            for line in data.splitlines():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn line from an interrupted write
+                if record.get("d"):
+                    self.index.pop(record["k"], None)
+                else:
+                    self.index[record["k"]] = (record["p"], record["o"], record["n"], record["h"])
+                    self.current_pack = max(self.current_pack, record["p"])
+
+    def _append_index(self, record):
+        with open(self._index_path(), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def _refresh_for(self, key):
+        # A miss always checks the log, so an entry another process has just
+        # stored is found at once; hits check it only now and then
+        if key not in self.index or time.monotonic() - self._checked > REFRESH_INTERVAL:
+            self._refresh()
+
+    def __contains__(self, key):
+        self._refresh_for(key)
+        return key in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def keys(self):
+        return list(self.index)
+
+    def checksum(self, key):
+        self._refresh_for(key)
+        entry = self.index.get(key)
+        return entry[3] if entry else None
+
+    def put(self, key, data):
+        """Append a blob under key, replacing any previous version."""
+        with self._lock, self._file_lock:
+            # Catch up with other writers so we append to the current pack
+            self._refresh()
+            pack_path = self._pack_path(self.current_pack)
+            if os.path.exists(pack_path) and os.path.getsize(pack_path) + len(data) > self.pack_size_limit:
+                self.current_pack += 1
+                pack_path = self._pack_path(self.current_pack)
+            with open(pack_path, "ab") as f:
+                offset = f.tell()
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            sha1 = hashlib.sha1(data).hexdigest()
+            # The index line is written only once the data is on disk
+            self._append_index({"k": key, "p": self.current_pack, "o": offset, "n": len(data), "h": sha1})
+            self._refresh()
+
+    def put_file(self, key, path):
+        with open(path, "rb") as f:
+            self.put(key, f.read())
+
+    def get(self, key, limit=None):
+        """Return the bytes stored under key (at most `limit` of them), or None."""
+        with self._lock:
+            self._refresh_for(key)
+            entry = self.index.get(key)
+            if entry is None:
+                return None
+            pack, offset, length, _ = entry
+            mapped = self._maps.get(pack)
+            if mapped is None or offset + length > mapped[1]:
+                try:
+                    mapped = self._map(pack)
+                except FileNotFoundError:
+                    # The pack was compacted away by another process
+                    self._refresh()
+                    return self.get(key, limit) if self.index.get(key) != entry else None
+            if limit is not None:
+                length = min(length, limit)
+            return mapped[0][offset:offset + length]
+
+    def open(self, key):
+        """Return a file-like object over a stored blob (for PIL and reportlab)."""
+        data = self.get(key)
+        if data is None:
+            raise KeyError(key)
+        return io.BytesIO(data)
+
+    def _map(self, pack):
+        old = self._maps.pop(pack, None)
+        if old:
+            old[0].close()
+        with open(self._pack_path(pack), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            mapped = (mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ), size)
+        self._maps[pack] = mapped
+        return mapped
+
+    def delete(self, key):
+        with self._lock, self._file_lock:
+            self._refresh()
+            if key in self.index:
+                self._append_index({"k": key, "d": 1})
+                self._refresh()
+
+    def close(self):
+        with self._lock:
+            for mapped, _ in self._maps.values():
+                mapped.close()
+            self._maps = {}
+
+    def stats(self):
+        packs = sorted(int(name[5:9]) for name in os.listdir(self.folder)
+                       if name.startswith("pack-") and name.endswith(".dat"))
+        total = sum(os.path.getsize(self._pack_path(p)) for p in packs)
+        live = sum(entry[2] for entry in self.index.values())
+        return {"entries": len(self.index), "packs": len(packs), "bytes": total, "dead_bytes": total - live}
+
+    def compact(self):
+        """
+        Rewrite live entries into fresh packs and drop deleted data. Other
+        processes reload the new index on their next refresh; an old pack one of
+        them still has open (which Windows will not delete) is left for the
+        next compaction.
+        """
+        with self._lock, self._file_lock:
+            self._refresh()
+            self.close()
+            old_packs = sorted(int(name[5:9]) for name in os.listdir(self.folder)
+                               if name.startswith("pack-") and name.endswith(".dat"))
+            first_new = (old_packs[-1] + 1) if old_packs else 0
+            new_index = {}
+            pack, out, written = first_new, None, 0
+            try:
+                for key, (old_pack, offset, length, sha1) in sorted(self.index.items(),
+                                                                    key=lambda item: item[1][:2]):
+                    with open(self._pack_path(old_pack), "rb") as src:
+                        src.seek(offset)
+                        data = src.read(length)
+                    if out is None or written + length > self.pack_size_limit:
+                        if out:
+                            out.close()
+                            pack += 1
+                        out = open(self._pack_path(pack), "wb")
+                        written = 0
+                    new_index[key] = (pack, written, length, sha1)
+                    out.write(data)
+                    written += length
+            finally:
+                if out:
+                    out.flush()
+                    os.fsync(out.fileno())
+                    out.close()
+
+            temp_index = self._index_path() + ".tmp"
+            with open(temp_index, "w", encoding="utf-8") as f:
+                for key, (p, o, n, h) in new_index.items():
+                    f.write(json.dumps({"k": key, "p": p, "o": o, "n": n, "h": h}, separators=(",", ":")) + "\n")
+            os.replace(temp_index, self._index_path())
+
+            for old in old_packs:
+                try:
+                    os.remove(self._pack_path(old))
+                except PermissionError:
+                    pass
+            self._load_index()
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage a packed image cache.")
+    parser.add_argument("folder", help="pack store folder")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="pack loose image files from a folder")
+    imp.add_argument("source")
+    sub.add_parser("compact", help="drop deleted entries")
+    sub.add_parser("stats", help="show entry and size counts")
+    args = parser.parse_args()
+
+    store = PackStore(args.folder)
+    if args.command == "import":
+        count = 0
+        for name in sorted(os.listdir(args.source)):
+            path = os.path.join(args.source, name)
+            if os.path.isfile(path) and name.lower().endswith((".jpg", ".png")) and name not in store:
+                store.put_file(name, path)
+                count += 1
+        print(f"Imported {count} images")
+    elif args.command == "compact":
+        store.compact()
+    print(store.stats())
+    store.close()
+
+if __name__ == "__main__":
+    main()
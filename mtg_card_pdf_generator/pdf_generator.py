@@ -1,86 +1,227 @@
+import os
+
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import inch, mm
+from reportlab.lib.utils import ImageReader
 
-def generate_pdf(front_image_files, back_image_files, output_pdf):
-    """
-    Generates a PDF with perfect front-to-back alignment.
-    Back sides are in reversed order per row for proper double-sided printing.
-    """
-    c = canvas.Canvas(output_pdf, pagesize=A4)
-    page_width, page_height = A4  # 595.44 x 841.68 points
+from image_cache import PACK_PREFIX, image_checksum, open_image
+
+try:
+    import pikepdf
+except ImportError:  # in requirements.txt; needed only for compact PDFs and page sizes
+    pikepdf = None
+
+# Fixed 3x3 grid
+COLS = ROWS = 3
+CARDS_PER_PAGE = COLS * ROWS
+
+# MTG card dimensions (2.5x3.5in, 63x88mm) + 2%
+SCALE_FACTOR = 1.02  # 2% larger
+CARD_WIDTH_IN = 2.5 * SCALE_FACTOR
+CARD_HEIGHT_IN = 3.5 * SCALE_FACTOR
+
+def slot_position(index):
+    """Return the (sheet, row, column) a card index lands on, all 1-based."""
+    slot = index % CARDS_PER_PAGE
+    return index // CARDS_PER_PAGE + 1, slot // COLS + 1, slot % COLS + 1
 
-    # MTG card dimensions (63x88mm) + 2%
-    scale_factor = 1.02  # 2% larger
-    card_width = 2.5 * 72 * scale_factor    # 183.6 points
-    card_height = 3.5 * 72 * scale_factor   # 257.04 points
+def sheet_layout(page_size=A4):
+    """Return (card_width, card_height, margin, gap) in points for the card grid on a page."""
+    page_width, page_height = page_size  # A4: 595.44 x 841.68 points
 
-    # Fixed 3x3 grid
-    cols = rows = 3
-    cards_per_page = cols * rows
+    card_width = CARD_WIDTH_IN * 72    # 183.6 points
+    card_height = CARD_HEIGHT_IN * 72  # 257.04 points
 
     # Calculate margins and gaps
-    total_cards_width = card_width * cols
-    total_cards_height = card_height * rows
-    
+    total_cards_width = card_width * COLS
+    total_cards_height = card_height * ROWS
+
     # Fixed margin for all sides (use left/right margin for top/bottom too)
     margin = (page_width - total_cards_width) / 2
-    
+
     # Adjust vertical spacing with scaled cards
     vertical_space = page_height - (2 * margin) - total_cards_height
-    gap = max(1, vertical_space / (rows - 1))  # Ensure at least 1 point gap
+    gap = max(1, vertical_space / (ROWS - 1))  # Ensure at least 1 point gap
+    return card_width, card_height, margin, gap
+
+def slot_origin(row, col, page_size=A4):
+    """Bottom-left corner of a grid slot in points (PDF coordinates)."""
+    card_width, card_height, margin, gap = sheet_layout(page_size)
+    # Calculate position (identical margins on all sides)
+    x = margin + col * card_width
+    y = margin + (ROWS - 1 - row) * (card_height + gap)
+    return x, y
+
+def sheet_slots(images, is_back=False):
+    """
+    Yield (row, col, image) for one sheet's worth of images. Back sides are in
+    reversed order per row, right-aligned, so they land behind their fronts.
+    """
+    for row in range(ROWS):
+        row_start = row * COLS
+        row_end = min(row_start + COLS, len(images))
+        row_images = images[row_start:row_end]
+
+        if is_back:
+            # Reverse the order of images in each row for back side
+            row_images = row_images[::-1]
+            # Fill in blanks to maintain alignment
+            row_images = [None] * (COLS - len(row_images)) + row_images
+
+        for col, img_file in enumerate(row_images):
+            yield row, col, img_file
+
+def crop_mark_lines(page_size=A4):
+    """Return the crop marks as (x1, y1, x2, y2) segments in points."""
+    page_width, page_height = page_size
+    card_width, card_height, margin, gap = sheet_layout(page_size)
+    lines = []
 
-    def draw_page(front_images, back_images, is_back=False):
+    # Vertical marks at fixed margin positions
+    for col in range(COLS + 1):
+        x = margin + col * card_width
+        lines.append((x - 5, margin - 10, x + 5, margin - 10))  # Bottom
+        lines.append((x - 5, page_height - margin + 10,
+                      x + 5, page_height - margin + 10))  # Top
+
+    # Horizontal marks
+    for row in range(ROWS + 1):
+        y = margin + row * (card_height + gap)
+        lines.append((margin - 10, y - 5, margin - 10, y + 5))  # Left
+        lines.append((page_width - margin + 10, y - 5,
+                      page_width - margin + 10, y + 5))  # Right
+    return lines
+
+def linearize_pdf(path):
+    """Rewrite a PDF in place as linearized ("fast web view") with object streams."""
+    if pikepdf is None:
+        raise RuntimeError("pikepdf is required to linearize PDFs (pip install pikepdf)")
+    temp_path = path + ".lin"
+    try:
+        with pikepdf.open(path) as pdf:
+            pdf.save(temp_path, linearize=True, compress_streams=True,
+                     object_stream_mode=pikepdf.ObjectStreamMode.generate)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def pdf_page_sizes(path):
+    """
+    Return the stored bytes each page adds to a PDF: its content stream plus
+    the images it is first to use (a shared image counts on one page only).
+    Returns None if pikepdf is not installed.
+    """
+    if pikepdf is None:
+        return None
+    seen = set()
+
+    def stream_size(obj):
+        if not isinstance(obj, pikepdf.Stream) or obj.objgen in seen:
+            return 0
+        seen.add(obj.objgen)
+        size = len(obj.read_raw_bytes())
+        if "/SMask" in obj:
+            size += stream_size(obj.SMask)
+        return size
+
+    sizes = []
+    with pikepdf.open(path) as pdf:
+        for page in pdf.pages:
+            contents = page.obj.get("/Contents")
+            streams = list(contents) if isinstance(contents, pikepdf.Array) else [contents]
+            xobjects = page.obj.get("/Resources", {}).get("/XObject", {})
+            streams.extend(xobjects[name] for name in xobjects.keys())
+            sizes.append(sum(stream_size(obj) for obj in streams))
+    return sizes
+
+def generate_pdf(front_image_files, back_image_files, output_pdf, slot_labels=None, compact=False):
+    """
+    Generates a PDF with perfect front-to-back alignment.
+    Back sides are in reversed order per row for proper double-sided printing.
+    slot_labels maps a card index to a short label (e.g. a deck name) printed
+    above that slot on the front sheet; a slot whose front image is None but
+    has a label is drawn as a separator card.
+
+    With `compact`, identical images under different names are embedded once
+    and the file is linearized afterwards (see linearize_pdf); this needs
+    pikepdf and raises RuntimeError without it.
+    Returns the number of pages written.
+    """
+    if compact and pikepdf is None:
+        raise RuntimeError("Compact PDFs need pikepdf to linearize them (pip install pikepdf)")
+    slot_labels = slot_labels or {}
+    readers = {}
+    by_checksum = {}
+    canonical = {}  # path -> first path seen with the same contents
+
+    def image_source(ref):
+        # Loose files go to reportlab by path; packed images are read once per document
+        if not ref.startswith(PACK_PREFIX):
+            if compact:
+                # reportlab only shares an image drawn under the same path;
+                # each path is hashed once per document
+                if ref not in canonical:
+                    canonical[ref] = by_checksum.setdefault(image_checksum(ref) or ref, ref)
+                ref = canonical[ref]
+            return ref
+        if ref not in readers:
+            readers[ref] = ImageReader(open_image(ref))
+        return readers[ref]
+
+    c = canvas.Canvas(output_pdf, pagesize=A4, pageCompression=1 if compact else None)
+    card_width, card_height, _, _ = sheet_layout(A4)
+    marks = crop_mark_lines(A4)
+
+    def draw_label(index, x, y):
+        label = slot_labels.get(index)
+        if not label:
+            return
+        c.setFillColorRGB(0.3, 0.3, 0.3)
+        c.setFont("Helvetica", 6)
+        c.drawString(x + 2, y + card_height + 2, label[:60])
+        if front_image_files[index] is None:
+            # Separator card: outline the slot and name the deck that follows
+            c.setLineWidth(0.5)
+            c.setStrokeColorRGB(0.6, 0.6, 0.6)
+            c.rect(x, y, card_width, card_height)
+            c.setFont("Helvetica-Bold", 14)
+            c.drawCentredString(x + card_width / 2, y + card_height / 2, label[:24])
+        c.setFillColorRGB(0, 0, 0)
+
+    def draw_page(front_images, back_images, is_back=False, first_index=0):
         images = back_images if is_back else front_images
-        for row in range(rows):
-            row_start = row * cols
-            row_end = min(row_start + cols, len(images))
-            row_images = images[row_start:row_end]
-            
-            if is_back:
-                # Reverse the order of images in each row for back side
-                row_images = row_images[::-1]
-                # Fill in blanks to maintain alignment
-                row_images = [None] * (cols - len(row_images)) + row_images
-
-            for col, img_file in enumerate(row_images):
-                # Calculate position (identical margins on all sides)
-                x = margin + col * card_width
-                y = margin + (rows - 1 - row) * (card_height + gap)
-
-                if img_file:
-                    c.drawImage(img_file, x, y, width=card_width, height=card_height,
-                              preserveAspectRatio=True)
+        for row, col, img_file in sheet_slots(images, is_back):
+            x, y = slot_origin(row, col)
+
+            if img_file:
+                c.drawImage(image_source(img_file), x, y, width=card_width, height=card_height,
+                          preserveAspectRatio=True)
+            if not is_back:
+                draw_label(first_index + row * COLS + col, x, y)
 
         # Draw crop marks with identical margins
         c.setLineWidth(0.5)
         c.setStrokeColorRGB(0.8, 0.8, 0.8)
-        
-        # Vertical marks at fixed margin positions
-        for col in range(cols + 1):
-            x = margin + col * card_width
-            c.line(x - 5, margin - 10, x + 5, margin - 10)  # Bottom
-            c.line(x - 5, page_height - margin + 10, 
-                  x + 5, page_height - margin + 10)  # Top
-
-        # Horizontal marks
-        for row in range(rows + 1):
-            y = margin + row * (card_height + gap)
-            c.line(margin - 10, y - 5, margin - 10, y + 5)  # Left
-            c.line(page_width - margin + 10, y - 5,
-                  page_width - margin + 10, y + 5)  # Right
+        for line in marks:
+            c.line(*line)
 
         c.showPage()
 
     # Generate pages with corresponding backs
     total_cards = len(front_image_files)
-    for i in range(0, total_cards, cards_per_page):
-        group_fronts = front_image_files[i:i+cards_per_page]
-        group_backs = back_image_files[i:i+cards_per_page]
-        draw_page(group_fronts, group_backs, is_back=False)
-        draw_page(group_fronts, group_backs, is_back=True)
+    for i in range(0, total_cards, CARDS_PER_PAGE):
+        group_fronts = front_image_files[i:i+CARDS_PER_PAGE]
+        group_backs = back_image_files[i:i+CARDS_PER_PAGE]
+        draw_page(group_fronts, group_backs, is_back=False, first_index=i)
+        draw_page(group_fronts, group_backs, is_back=True, first_index=i)
 
+    pages = c.getPageNumber() - 1
     c.save()
+    if compact:
+        linearize_pdf(output_pdf)
+    return pages
 
 if __name__ == "__main__":
     # Test PDF generation
@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+
+import requests
+
+from print_service import DEFAULT_HOST, DEFAULT_PORT, FINISHED
+
+SERVICE_URL = os.environ.get("MTG_PRINT_SERVICE", f"http://{DEFAULT_HOST}:{DEFAULT_PORT}")
+
+def is_running(timeout=0.5):
+    """True if a print service answers at SERVICE_URL."""
+    try:
+        return requests.get(f"{SERVICE_URL}/ping", timeout=timeout).ok
+    except requests.exceptions.RequestException:
+        return False
+
+def submit_job(decklist_file, card_back, priority=0, dpi=None):
+    """Send a decklist to the service; returns the job as a dict."""
+    with open(decklist_file, "r", encoding="utf-8-sig") as f:
+        decklist = f.read()
+    response = requests.post(
+        f"{SERVICE_URL}/jobs",
+        json={"decklist": decklist, "card_back": os.path.abspath(card_back),
+              "priority": priority, "dpi": dpi},
+        timeout=10
+    )
+    response.raise_for_status()
+    return response.json()
+
+def get_job(job_id):
+    response = requests.get(f"{SERVICE_URL}/jobs/{job_id}", timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+def cancel_job(job_id):
+    response = requests.delete(f"{SERVICE_URL}/jobs/{job_id}", timeout=10)
+    response.raise_for_status()
+    return response.json()["cancelled"]
+
+def stream_events(job_id, since=0):
+    """Yield a job's progress events as they happen, ending with its "complete" event."""
+    with requests.get(f"{SERVICE_URL}/jobs/{job_id}/events", params={"since": since},
+                      stream=True, timeout=(5, None)) as response:
+        response.raise_for_status()
+        for line in response.iter_lines(decode_unicode=True):
+            if line:
+                yield json.loads(line)
+
+def download_pdf(job_id, output_pdf):
+    with requests.get(f"{SERVICE_URL}/jobs/{job_id}/pdf", stream=True, timeout=(5, 60)) as response:
+        response.raise_for_status()
+        with open(output_pdf, "wb") as f:
+            for chunk in response.iter_content(chunk_size=65536):
+                f.write(chunk)
+
+def main():
+    parser = argparse.ArgumentParser(description="Client for the local print service.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    submit = sub.add_parser("submit", help="queue a decklist and wait for the PDF")
+    submit.add_argument("decklist")
+    submit.add_argument("--back", default="assets/card_back.jpg", help="card back image")
+    submit.add_argument("--priority", type=int, default=0)
+    submit.add_argument("--dpi", type=int, help="target print resolution")
+    submit.add_argument("--output", default="mtg_cards_print.pdf")
+    submit.add_argument("--no-wait", action="store_true", help="return once queued")
+
+    sub.add_parser("list", help="list jobs")
+    status = sub.add_parser("status", help="show a job")
+    status.add_argument("job_id")
+    cancel = sub.add_parser("cancel", help="cancel a job")
+    cancel.add_argument("job_id")
+
+    args = parser.parse_args()
+
+    if args.command == "list":
+        response = requests.get(f"{SERVICE_URL}/jobs", timeout=10)
+        response.raise_for_status()
+        for job in response.json():
+            print(f"{job['id']}  {job['status']:<9}  p{job['priority']}  {job['progress']:5.1f}%  {job['message']}")
+    elif args.command == "status":
+        print(json.dumps(get_job(args.job_id), indent=2))
+    elif args.command == "cancel":
+        print("Cancelled" if cancel_job(args.job_id) else "Job already finished")
+    else:
+        job = submit_job(args.decklist, args.back, args.priority, args.dpi)
+        print(f"Queued job {job['id']}")
+        if args.no_wait:
+            return
+        for event in stream_events(job["id"]):
+            if event["action"] == "status":
+                print(event["args"][0])
+            elif event["action"] == "log":
+                message, level = event["args"][0]
+                if level != "INFO":
+                    print(f"{level}: {message}")
+        job = get_job(job["id"])
+        if job["status"] == "done":
+            download_pdf(job["id"], args.output)
+            print(f"Saved {args.output}")
+        elif job["status"] in FINISHED:
+            print(f"Job {job['status']}: {job['message']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+import argparse
+import heapq
+import itertools
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from build import BuildCancelled, BuildError, build_pdf
+from image_cache import IMAGE_FOLDER
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+JOBS_FOLDER = os.path.abspath("print_jobs")
+EVENT_WAIT = 15  # seconds a streaming request waits for news before a keep-alive line
+JOB_RETENTION = 24 * 60 * 60       # finished jobs are dropped this long after finishing...
+DOWNLOADED_RETENTION = 60 * 60     # ...or this long after their PDF was first downloaded
+PRUNE_INTERVAL = 10 * 60
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+class PrintJob:
+    def __init__(self, job_id, decklist_file, output_pdf, card_back, priority=0, dpi=None):
+        self.id = job_id
+        self.decklist_file = decklist_file
+        self.output_pdf = output_pdf
+        self.card_back = card_back
+        self.priority = priority
+        self.dpi = dpi
+        self.status = QUEUED
+        self.progress = 0
+        self.message = ""
+        self.created = time.time()
+        self.finished = None
+        self.downloaded = None
+        self.events = []
+        self.cancel_event = threading.Event()
+        self.changed = threading.Condition()
+
+    def report(self, action, *args):
+        """build_pdf report callback; records the update as a streamable event."""
+        with self.changed:
+            if action == "progress":
+                self.progress = args[0]
+            elif action == "status":
+                self.message = args[0]
+            self.events.append({"seq": len(self.events), "action": action, "args": list(args)})
+            self.changed.notify_all()
+
+    def finish(self, status, message):
+        with self.changed:
+            self.status = status
+            self.message = message
+            self.finished = time.time()
+            self.events.append({"seq": len(self.events), "action": "complete",
+                                "args": [status == DONE, message]})
+            self.changed.notify_all()
+
+    def wait_events(self, since, timeout):
+        """Return events from index `since`, waiting up to `timeout` for new ones."""
+        with self.changed:
+            if len(self.events) <= since and self.status not in FINISHED:
+                self.changed.wait(timeout)
+            return self.events[since:]
+
+    def expired(self, now, retention=JOB_RETENTION, downloaded_retention=DOWNLOADED_RETENTION):
+        if self.status not in FINISHED:
+            return False
+        if self.downloaded is not None and now - self.downloaded > downloaded_retention:
+            return True
+        return now - self.finished > retention
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "priority": self.priority,
+            "dpi": self.dpi,
+            "progress": self.progress,
+            "message": self.message,
+            "created": self.created,
+        }
+
+class PrintService:
+    """
+    Priority queue of print jobs run by a pool of worker threads. All jobs share
+    this process's resolver, image cache and HTTP session, so the cache stays warm
+    across operators. Finished jobs and their folders are pruned after
+    `retention` seconds, or an hour after their PDF was downloaded.
+    """
+    def __init__(self, workers=2, image_folder=IMAGE_FOLDER, jobs_folder=JOBS_FOLDER,
+                 retention=JOB_RETENTION):
+        self.image_folder = image_folder
+        self.jobs_folder = jobs_folder
+        self.retention = retention
+        self.jobs = {}
+        self._queue = []
+        self._order = itertools.count()
+        self._lock = threading.Condition()
+        os.makedirs(image_folder, exist_ok=True)
+        os.makedirs(jobs_folder, exist_ok=True)
+        # Job folders left by a previous run of the service are no longer reachable
+        for name in os.listdir(jobs_folder):
+            shutil.rmtree(os.path.join(jobs_folder, name), ignore_errors=True)
+        for i in range(workers):
+            threading.Thread(target=self._worker, name=f"print-worker-{i}", daemon=True).start()
+        threading.Thread(target=self._pruner, name="print-pruner", daemon=True).start()
+
+    def submit(self, decklist_text, card_back, priority=0, dpi=None):
+        """Queue a decklist; higher priority runs first, ties run in submission order."""
+        job_id = uuid.uuid4().hex[:12]
+        folder = os.path.join(self.jobs_folder, job_id)
+        os.makedirs(folder)
+        decklist_file = os.path.join(folder, "decklist.txt")
+        with open(decklist_file, "w", encoding="utf-8") as f:
+            f.write(decklist_text)
+        job = PrintJob(job_id, decklist_file, os.path.join(folder, "output.pdf"), card_back, priority, dpi)
+        with self._lock:
+            self.jobs[job_id] = job
+            heapq.heappush(self._queue, (-priority, next(self._order), job))
+            self._lock.notify()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self):
+        with self._lock:
+            return list(self.jobs.values())
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns False if it already finished."""
+        job = self.get(job_id)
+        if job is None:
+            return False
+        with job.changed:
+            if job.status in FINISHED:
+                return False
+            job.cancel_event.set()
+            if job.status == QUEUED:
+                job.finish(CANCELLED, "Cancelled before starting.")
+        return True
+
+    def prune(self):
+        """Forget expired jobs and delete their folders; returns how many were dropped."""
+        now = time.time()
+        with self._lock:
+            expired = [job for job in self.jobs.values() if job.expired(now, self.retention)]
+            for job in expired:
+                del self.jobs[job.id]
+        for job in expired:
+            shutil.rmtree(os.path.dirname(job.decklist_file), ignore_errors=True)
+        return len(expired)
+
+    def _pruner(self):
+        while True:
+            time.sleep(PRUNE_INTERVAL)
+            self.prune()
+
+    def _worker(self):
+        while True:
+            with self._lock:
+                while not self._queue:
+                    self._lock.wait()
+                _, _, job = heapq.heappop(self._queue)
+            with job.changed:
+                if job.cancel_event.is_set():
+                    continue
+                job.status = RUNNING
+            try:
+                build_pdf(job.decklist_file, job.output_pdf, job.card_back, self.image_folder,
+                          report=job.report, cancel_event=job.cancel_event, dpi=job.dpi)
+                job.finish(DONE, "PDF Generated: Remember to Save!")
+            except BuildCancelled as e:
+                job.finish(CANCELLED, str(e))
+            except BuildError as e:
+                job.finish(FAILED, str(e))
+            except Exception as e:
+                job.report("log", (str(e), "ERROR"))
+                job.finish(FAILED, str(e))
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    POST   /jobs                {"decklist": text, "card_back": path, "priority": n, "dpi": n}
+    GET    /jobs                list jobs
+    GET    /jobs/<id>           job status
+    GET    /jobs/<id>/events    newline-delimited JSON events, streamed until the job ends
+    GET    /jobs/<id>/pdf       the finished PDF
+    DELETE /jobs/<id>           cancel
+    """
+    server_version = "MTGPrintService/1.0"
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def log_message(self, format, *args):
+        pass  # keep the console for job output
+
+    def _send_json(self, data, status=200):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _job(self, parts):
+        job = self.service.get(parts[1]) if len(parts) > 1 else None
+        if job is None:
+            self._send_json({"error": "no such job"}, 404)
+        return job
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        if parts == ["ping"]:
+            return self._send_json({"ok": True})
+        if parts == ["jobs"]:
+            return self._send_json([job.to_dict() for job in self.service.list_jobs()])
+        if parts[0] != "jobs":
+            return self._send_json({"error": "not found"}, 404)
+        job = self._job(parts)
+        if job is None:
+            return
+        if len(parts) == 2:
+            return self._send_json(job.to_dict())
+        if parts[2] == "events":
+            try:
+                since = int(parse_qs(url.query).get("since", ["0"])[0])
+            except ValueError:
+                return self._send_json({"error": "bad request: since must be an integer"}, 400)
+            return self._stream_events(job, max(since, 0))
+        if parts[2] == "pdf":
+            return self._send_pdf(job)
+        self._send_json({"error": "not found"}, 404)
+
+    def _stream_events(self, job, since):
+        # HTTP/1.0 response without Content-Length: the body ends when the job does
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        while True:
+            events = job.wait_events(since, EVENT_WAIT)
+            lines = "".join(json.dumps(event) + "\n" for event in events) or "\n"
+            try:
+                self.wfile.write(lines.encode("utf-8"))
+                self.wfile.flush()
+            except OSError:
+                return  # client went away
+            since += len(events)
+            if job.status in FINISHED and since >= len(job.events):
+                return
+
+    def _send_pdf(self, job):
+        if job.status != DONE:
+            return self._send_json({"error": f"job is {job.status}"}, 409)
+        try:
+            with open(job.output_pdf, "rb") as f:
+                body = f.read()
+        except FileNotFoundError:
+            # Pruned while this request was on its way
+            return self._send_json({"error": "job has expired"}, 410)
+        if job.downloaded is None:
+            job.downloaded = time.time()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            return self._send_json({"error": "not found"}, 404)
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("body must be a JSON object")
+            decklist = request["decklist"]
+            card_back = request.get("card_back", "assets/card_back.jpg")
+            if not isinstance(decklist, str) or not isinstance(card_back, str):
+                raise ValueError("decklist and card_back must be strings")
+            priority = int(request.get("priority", 0))
+            dpi = int(request["dpi"]) if request.get("dpi") else None
+        except (KeyError, ValueError, TypeError) as e:
+            return self._send_json({"error": f"bad request: {e}"}, 400)
+        job = self.service.submit(decklist, card_back, priority, dpi)
+        self._send_json(job.to_dict(), 201)
+
+    def do_DELETE(self):
+        parts = urlparse(self.path).path.strip("/").split("/")
+        if parts[0] != "jobs":
+            return self._send_json({"error": "not found"}, 404)
+        job = self._job(parts)
+        if job is None:
+            return
+        self._send_json({"cancelled": self.service.cancel(job.id)})
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=2, image_folder=IMAGE_FOLDER,
+          retention=JOB_RETENTION):
+    """Run the print service until interrupted. Binds to localhost by default."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.service = PrintService(workers, image_folder, retention=retention)
+    print(f"Print service listening on http://{host}:{port} with {workers} worker(s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local print-job service shared by GUI and CLI clients.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--folder", default=IMAGE_FOLDER, help="image cache folder")
+    parser.add_argument("--retention-hours", type=float, default=JOB_RETENTION / 3600,
+                        help="how long finished jobs and their PDFs are kept")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.folder, args.retention_hours * 3600)
+
+if __name__ == "__main__":
+    main()
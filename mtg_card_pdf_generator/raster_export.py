@@ -0,0 +1,106 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+from reportlab.lib.pagesizes import A4
+
+from image_cache import open_image
+from pdf_generator import CARDS_PER_PAGE, COLS, crop_mark_lines, sheet_layout, sheet_slots, slot_origin
+
+RASTER_FORMATS = {
+    "png": ("PNG", {}),
+    "tiff": ("TIFF", {"compression": "tiff_lzw"}),
+}
+
+def _to_pixels(value, dpi):
+    return int(round(value * dpi / 72))
+
+def _font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has a single fixed-size default font
+        return ImageFont.load_default()
+
+def render_sheet(images, is_back, dpi, output_path, fmt="png", labels=None, page_size=A4):
+    """
+    Composite one sheet side onto a white canvas at `dpi` and write it to output_path.
+    Uses the same grid, margins, crop marks and back mirroring as generate_pdf;
+    `labels` maps a slot index on this sheet to a deck label (fronts only).
+    """
+    page_width, page_height = page_size
+    card_width, card_height, _, _ = sheet_layout(page_size)
+    box = (_to_pixels(card_width, dpi), _to_pixels(card_height, dpi))
+    sheet = Image.new("RGB", (_to_pixels(page_width, dpi), _to_pixels(page_height, dpi)), "white")
+    draw = ImageDraw.Draw(sheet)
+    labels = labels or {}
+
+    def to_canvas(x, y):
+        # PDF points (origin bottom-left) to pixels (origin top-left)
+        return _to_pixels(x, dpi), _to_pixels(page_height - y, dpi)
+
+    for row, col, ref in sheet_slots(images, is_back):
+        x, y = slot_origin(row, col, page_size)
+        left, bottom = to_canvas(x, y)
+        top = bottom - box[1]
+        if ref:
+            with Image.open(open_image(ref)) as img:
+                card = ImageOps.contain(img.convert("RGB"), box, Image.Resampling.LANCZOS)
+            # Centre in the slot, as preserveAspectRatio does in the PDF
+            sheet.paste(card, (left + (box[0] - card.width) // 2, top + (box[1] - card.height) // 2))
+
+        label = None if is_back else labels.get(row * COLS + col)
+        if label:
+            draw.text((left + _to_pixels(2, dpi), top - _to_pixels(8, dpi)), label[:60],
+                      fill=(77, 77, 77), font=_font(_to_pixels(6, dpi)))
+            if not ref:
+                # Separator card: outline the slot and name the deck that follows
+                draw.rectangle((left, top, left + box[0], bottom), outline=(153, 153, 153),
+                               width=max(1, _to_pixels(0.5, dpi)))
+                draw.text((left + box[0] // 2, top + box[1] // 2), label[:24], fill=(77, 77, 77),
+                          font=_font(_to_pixels(14, dpi)), anchor="mm")
+
+    line_width = max(1, _to_pixels(0.5, dpi))
+    for x1, y1, x2, y2 in crop_mark_lines(page_size):
+        draw.line((to_canvas(x1, y1), to_canvas(x2, y2)), fill=(204, 204, 204), width=line_width)
+
+    pil_format, options = RASTER_FORMATS[fmt]
+    sheet.save(output_path, pil_format, dpi=(dpi, dpi), **options)
+    return output_path
+
+def export_sheets(front_image_files, back_image_files, output_dir, dpi=300, fmt="png",
+                  slot_labels=None, workers=None, prefix="sheet", progress=None):
+    """
+    Render every sheet side to its own image file, in parallel processes.
+    Files are named <prefix>_<sheet>_front/back.<fmt> and written as each
+    finishes; `progress(done, total, path)` is called per file.
+    Returns the written paths in sheet order.
+    """
+    if fmt not in RASTER_FORMATS:
+        raise ValueError(f"fmt must be one of {', '.join(RASTER_FORMATS)}")
+    os.makedirs(output_dir, exist_ok=True)
+    slot_labels = slot_labels or {}
+
+    jobs = []
+    for sheet, i in enumerate(range(0, len(front_image_files), CARDS_PER_PAGE), start=1):
+        fronts = front_image_files[i:i+CARDS_PER_PAGE]
+        backs = back_image_files[i:i+CARDS_PER_PAGE]
+        labels = {index - i: label for index, label in slot_labels.items()
+                  if i <= index < i + CARDS_PER_PAGE}
+        for side, images, is_back in (("front", fronts, False), ("back", backs, True)):
+            path = os.path.join(output_dir, f"{prefix}_{sheet:03d}_{side}.{fmt}")
+            jobs.append((images, is_back, dpi, path, fmt, labels))
+
+    paths = [job[3] for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(render_sheet, *job) for job in jobs]
+        for done, future in enumerate(as_completed(futures), start=1):
+            path = future.result()
+            if progress:
+                progress(done, len(jobs), path)
+    return paths
+
+if __name__ == "__main__":
+    # Test raster export
+    fronts = ["test_front.jpg"] * 9  # Test with 9 cards
+    backs = ["test_back.jpg"] * 9  # Test with 9 backs
+    print(export_sheets(fronts, backs, "test_sheets", dpi=300))
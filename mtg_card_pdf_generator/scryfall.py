@@ -1,8 +1,13 @@
 import requests
 from requests.exceptions import Timeout, RequestException
 from mtgjson_helper import MTGJSONDatabase
+from http_session import session
+from card_names import get_card_name_index
 from tqdm import tqdm
+from file_lock import replace_file
 import os  # Added import
+import tempfile
+import threading
 
 class CardNotFoundError(Exception):
     pass
@@ -11,13 +16,108 @@ class CardNotFoundError(Exception):
 CONNECT_TIMEOUT = 5  # seconds
 READ_TIMEOUT = 10    # seconds
 
+# Scryfall image sizes and their pixel dimensions, smallest first
+IMAGE_SIZES = (
+    ("small", 146, 204),
+    ("normal", 488, 680),
+    ("large", 672, 936),
+    ("png", 745, 1040),
+)
+IMAGE_SIZE_WIDTHS = {name: width for name, width, _ in IMAGE_SIZES}
+
+def image_size_for_dpi(dpi, card_width_in, card_height_in):
+    """Return the smallest Scryfall image size that prints at `dpi` or better at the given card size."""
+    for name, width, height in IMAGE_SIZES:
+        if width >= dpi * card_width_in and height >= dpi * card_height_in:
+            return name
+    return IMAGE_SIZES[-1][0]  # best available
+
 class CardSides:
     def __init__(self, front_url, back_url=None):
         self.front_url = front_url
         self.back_url = back_url
 
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Share one in-flight call per key between concurrent callers.
+    The first caller for a key does the work; the others wait for its result
+    (or its exception) instead of repeating the request.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+def card_sides_from_data(data, image_size="normal"):
+    """Build CardSides from a Scryfall card object, or return None if it has no images."""
+    faces = data.get("card_faces") or []
+    # Double-faced cards carry images per face; split and adventure cards share one
+    if len(faces) > 1 and "image_uris" in faces[0] and "image_uris" in faces[1]:
+        return CardSides(
+            faces[0]["image_uris"][image_size],
+            faces[1]["image_uris"][image_size]
+        )
+    if "image_uris" in data and image_size in data["image_uris"]:
+        return CardSides(data["image_uris"][image_size])
+    return None
+
+def search_cards(query, unique="cards"):
+    """Yield every Scryfall card object matching a search query, following pagination."""
+    url = "https://api.scryfall.com/cards/search"
+    params = {"q": query, "unique": unique}
+    while url:
+        response = session.get(
+            url,
+            params=params,
+            headers={"User-Agent": "MTGCardPDFGenerator/1.0"},
+            timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+        )
+        if response.status_code == 404:
+            return  # Scryfall answers 404 when nothing matches
+        response.raise_for_status()
+        data = response.json()
+        yield from data.get("data", [])
+        url = data.get("next_page") if data.get("has_more") else None
+        params = None  # next_page already carries the query
+
+_lookups = SingleFlight()
+_downloads = SingleFlight()
+
 def get_card_image_url(card_name, variant_info=None, image_size="normal"):
     """Get card image URLs, trying variant first then falling back to base version."""
+    key = (card_name.lower(), variant_info.lower() if variant_info else None, image_size)
+    return _lookups.do(key, _resolve_card_image_url, card_name, variant_info, image_size)
+
+def _resolve_card_image_url(card_name, variant_info=None, image_size="normal"):
     try:
         # Initialize MTGJSON database for variant lookups
         mtgjson = MTGJSONDatabase()
@@ -25,6 +125,11 @@ def get_card_image_url(card_name, variant_info=None, image_size="normal"):
         if variant_info:
             # Try to find specific variant first
             variant_data = mtgjson.find_variant(card_name, variant_info)
+            if variant_data:
+                # The lookup already returned the printing, so use its images directly
+                sides = card_sides_from_data(variant_data['card'], image_size)
+                if sides:
+                    return sides
             if variant_data and variant_data['id']:
                 try:
                     return get_specific_printing_image(variant_data['id'], image_size)
@@ -42,7 +147,7 @@ def get_specific_printing_image(scryfall_id, image_size="normal"):
     """Get image URLs for specific printing, including back face if available."""
     url = f"https://api.scryfall.com/cards/{scryfall_id}"
     try:
-        response = requests.get(
+        response = session.get(
             url, 
             headers={"User-Agent": "MTGCardPDFGenerator/1.0"},
             timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
@@ -50,13 +155,9 @@ def get_specific_printing_image(scryfall_id, image_size="normal"):
         response.raise_for_status()
         data = response.json()
         
-        # Handle double-faced cards
-        if "card_faces" in data and len(data["card_faces"]) > 1:
-            front_url = data["card_faces"][0]["image_uris"][image_size]
-            back_url = data["card_faces"][1]["image_uris"][image_size]
-            return CardSides(front_url, back_url)
-        elif "image_uris" in data:
-            return CardSides(data["image_uris"][image_size])
+        sides = card_sides_from_data(data, image_size)
+        if sides:
+            return sides
         raise CardNotFoundError("No image found")
     except Timeout:
         print(f"Timeout accessing Scryfall API for ID: {scryfall_id}")
@@ -69,6 +170,8 @@ def progressively_search_card(card_name, image_size="normal"):
     """
     Progressively search for a card by shortening the name until a match is found.
     Example: "Jace, the Mind Sculptor (WWK)" -> "Jace, the Mind Sculptor" -> "Jace"
+    Each variant costs a request, so this is only the fallback when the local
+    name index (see card_names.py) is unavailable or has no close match.
     """
     original_name = card_name
     variants = []
@@ -97,7 +200,7 @@ def progressively_search_card(card_name, image_size="normal"):
         try:
             print(f"Trying search with: {variant}")
             url = f"https://api.scryfall.com/cards/named?fuzzy={variant}"
-            response = requests.get(
+            response = session.get(
                 url,
                 headers={"User-Agent": "MTGCardPDFGenerator/1.0"},
                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
@@ -106,13 +209,9 @@ def progressively_search_card(card_name, image_size="normal"):
             data = response.json()
             
             # If we found a match, return it
-            if "card_faces" in data and len(data["card_faces"]) > 1:
-                return CardSides(
-                    data["card_faces"][0]["image_uris"][image_size],
-                    data["card_faces"][1]["image_uris"][image_size]
-                )
-            elif "image_uris" in data:
-                return CardSides(data["image_uris"][image_size])
+            sides = card_sides_from_data(data, image_size)
+            if sides:
+                return sides
             
         except Exception as e:
             last_error = e
@@ -121,33 +220,41 @@ def progressively_search_card(card_name, image_size="normal"):
     # If we get here, no variant worked
     raise CardNotFoundError(f"Could not find card: {original_name} (tried variants: {', '.join(variants)}). Last error: {last_error}")
 
+def _named_exact(card_name):
+    return session.get(
+        "https://api.scryfall.com/cards/named",
+        params={"exact": card_name},
+        headers={"User-Agent": "MTGCardPDFGenerator/1.0"},
+        timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+    )
+
 def get_base_version_image(card_name, image_size="normal"):
     """Get image URLs for base version, including back face if available."""
     try:
         # First try exact match
-        url = f"https://api.scryfall.com/cards/named?exact={card_name}"
-        response = requests.get(
-            url, 
-            headers={"User-Agent": "MTGCardPDFGenerator/1.0"},
-            timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
-        )
-        
-        # If exact match fails, try progressive fallback
+        response = _named_exact(card_name)
+
         if response.status_code == 404:
-            return progressively_search_card(card_name, image_size)
-            
+            # Correct typos against the local name index before the slower
+            # progressive search. Only after a miss: the catalog lags new
+            # releases and leaves out tokens, so a name it lacks may be real.
+            index = get_card_name_index()
+            match = index.best_match(card_name) if index is not None else None
+            if not match or match == card_name:
+                return progressively_search_card(card_name, image_size)
+            print(f"Matched '{card_name}' to '{match}' locally")
+            card_name = match
+            response = _named_exact(card_name)
+            if response.status_code == 404:
+                return progressively_search_card(card_name, image_size)
+
         response.raise_for_status()
         data = response.json()
         
-        # Handle double-faced cards
-        if "card_faces" in data and len(data["card_faces"]) > 1:
-            return CardSides(
-                data["card_faces"][0]["image_uris"][image_size],
-                data["card_faces"][1]["image_uris"][image_size]
-            )
-        elif "image_uris" in data and image_size in data["image_uris"]:
-            return CardSides(data["image_uris"][image_size])
-        
+        sides = card_sides_from_data(data, image_size)
+        if sides:
+            return sides
+
         # If we get here with no images, try progressive fallback
         return progressively_search_card(card_name, image_size)
             
@@ -160,8 +267,18 @@ def get_base_version_image(card_name, image_size="normal"):
 
 def download_image(url, file_path):
     """Downloads an image from the provided URL and saves it to file_path."""
+    key = (url, os.path.abspath(file_path))
+    return _downloads.do(key, _download_image, url, file_path)
+
+def _download_image(url, file_path):
+    # Write to a temp file of our own next to the target and rename it once
+    # complete, so neither an interrupted download nor another process writing
+    # the same image leaves a partial file under the cached name
+    fd, part_path = tempfile.mkstemp(prefix=os.path.basename(file_path) + ".",
+                                     suffix=".part", dir=os.path.dirname(os.path.abspath(file_path)))
+    os.close(fd)
     try:
-        response = requests.get(
+        response = session.get(
             url, 
             headers={"User-Agent": "MTGCardPDFGenerator/1.0"},
             timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
@@ -183,16 +300,24 @@ def download_image(url, file_path):
             leave=False
         ) as pbar:
             # Download with progress
-            with open(file_path, "wb") as f:
+            received = 0
+            with open(part_path, "wb") as f:
                 for chunk in response.iter_content(chunk_size=8192):
                     if chunk:
                         f.write(chunk)
+                        received += len(chunk)
                         pbar.update(len(chunk))
-        
+
+        if file_size and received != file_size:
+            raise IOError(f"Incomplete download: got {received} of {file_size} bytes")
+        replace_file(part_path, file_path)
+
         print(f"✓ Downloaded: {desc}")
         
     except Exception as e:
         print(f"Error downloading image from {url}: {e}")
+        if os.path.exists(part_path):
+            os.remove(part_path)
         raise
 
 if __name__ == "__main__":
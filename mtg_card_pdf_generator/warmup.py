@@ -0,0 +1,153 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from tqdm import tqdm
+
+from checkpoint import file_checksum
+from deck_parser import iter_decklist
+from image_cache import IMAGE_FOLDER, fetch_card_images, is_cached
+from pdf_generator import CARD_HEIGHT_IN, CARD_WIDTH_IN
+from scryfall import CardSides, card_sides_from_data, image_size_for_dpi, search_cards
+
+STATE_FOLDER = ".warmup"
+
+def collect_targets(set_codes=(), query=None, list_file=None, image_size="normal"):
+    """
+    Gather the cards to warm as dicts with name, variant_info and, when a
+    search already returned them, the image URLs. Duplicate names are dropped
+    because the cache stores one image per card name.
+    """
+    targets = {}
+
+    queries = [f"set:{code.strip().lower()}" for code in set_codes if code.strip()]
+    if query:
+        queries.append(query)
+    for q in queries:
+        for card in search_cards(q, unique="cards"):
+            sides = card_sides_from_data(card, image_size)
+            if not sides or card["name"] in targets:
+                continue
+            targets[card["name"]] = {
+                "name": card["name"],
+                "variant_info": f"({card['set']}) {card.get('collector_number', '')}".strip(),
+                "front_url": sides.front_url,
+                "back_url": sides.back_url,
+            }
+
+    if list_file:
+        for entry in iter_decklist(list_file):
+            targets.setdefault(entry.name, {
+                "name": entry.name,
+                "variant_info": entry.variant_info,
+                "front_url": None,
+                "back_url": None,
+            })
+
+    return list(targets.values())
+
+def _state_path(image_folder, set_codes, query, list_file, image_size):
+    # Keyed on the list's contents, so editing it starts a fresh target list
+    key = json.dumps([sorted(set_codes), query, list_file and file_checksum(list_file), image_size])
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(image_folder, STATE_FOLDER, f"{digest}.json")
+
+def warm_cache(set_codes=(), query=None, list_file=None, image_folder=IMAGE_FOLDER,
+               image_size="normal", workers=4, progress=None, stop_event=None):
+    """
+    Resolve and download every matching card into the image cache.
+
+    The target list is checkpointed next to the cache, so an interrupted run
+    resumes without repeating the search and skips images already on disk.
+    `progress(done, total, card_name)` is called after each card; setting
+    `stop_event` stops the run after the cards already in flight.
+    Returns the list of (card name, error) pairs that failed.
+    """
+    os.makedirs(os.path.join(image_folder, STATE_FOLDER), exist_ok=True)
+    state_path = _state_path(image_folder, list(set_codes), query, list_file, image_size)
+
+    if os.path.exists(state_path):
+        with open(state_path, "r", encoding="utf-8") as f:
+            targets = json.load(f)
+        print(f"Resuming warm-up from {state_path}")
+    else:
+        targets = collect_targets(set_codes, query, list_file, image_size)
+        with open(state_path, "w", encoding="utf-8") as f:
+            json.dump(targets, f)
+
+    pending = [t for t in targets if not is_cached(t["name"], image_folder, image_size)]
+    total = len(targets)
+    done = total - len(pending)
+    failed = []
+    lock = threading.Lock()
+
+    def warm(target):
+        if stop_event is not None and stop_event.is_set():
+            return
+        sides = None
+        if target["front_url"]:
+            sides = CardSides(target["front_url"], target["back_url"])
+        fetch_card_images(target["name"], target["variant_info"], image_folder,
+                          image_size=image_size, sides=sides)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(warm, target): target for target in pending}
+        for future in as_completed(futures):
+            name = futures[future]["name"]
+            try:
+                future.result()
+            except Exception as e:
+                failed.append((name, e))
+            with lock:
+                done += 1
+                if progress:
+                    progress(done, total, name)
+
+    stopped = stop_event is not None and stop_event.is_set()
+    if not failed and not stopped:
+        os.remove(state_path)
+    return failed
+
+def start_warm_cache(*args, **kwargs):
+    """Run warm_cache in a daemon thread; returns (thread, stop_event)."""
+    stop_event = kwargs.setdefault("stop_event", threading.Event())
+    thread = threading.Thread(target=warm_cache, args=args, kwargs=kwargs, daemon=True)
+    thread.start()
+    return thread, stop_event
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-download card images into the cache.")
+    parser.add_argument("--set", dest="set_codes", action="append", default=[],
+                        help="set code to warm (repeatable)")
+    parser.add_argument("--query", help="Scryfall search query, e.g. 'f:modern is:staple'")
+    parser.add_argument("--list", dest="list_file", help="decklist or staple list file")
+    parser.add_argument("--folder", default=IMAGE_FOLDER, help="image cache folder")
+    parser.add_argument("--size", default="normal", help="Scryfall image size")
+    parser.add_argument("--dpi", type=int, help="target print resolution; overrides --size")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    if not (args.set_codes or args.query or args.list_file):
+        parser.error("give at least one of --set, --query or --list")
+    if args.dpi:
+        args.size = image_size_for_dpi(args.dpi, CARD_WIDTH_IN, CARD_HEIGHT_IN)
+
+    with tqdm(desc="Warming cache", unit="card") as pbar:
+        def progress(done, total, name):
+            pbar.total = total
+            pbar.n = done
+            pbar.set_postfix_str(name)
+            pbar.refresh()
+
+        failed = warm_cache(args.set_codes, args.query, args.list_file, args.folder,
+                            args.size, args.workers, progress)
+
+    for name, error in failed:
+        print(f"Failed: {name}: {error}")
+    print(f"Warm-up finished with {len(failed)} failure(s).")
+
+if __name__ == "__main__":
+    main()